@@ -0,0 +1,77 @@
+"""per-user reminder hour buckets and user timezone
+
+Revision ID: 20261017_0009
+Revises: 20260216_0008
+Create Date: 2026-10-17 09:00:00
+"""
+
+import os
+from zoneinfo import ZoneInfo
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261017_0009"
+down_revision = "20260216_0008"
+branch_labels = None
+depends_on = None
+
+SLOT_NAMES = ["morning", "midday", "night"]
+
+
+def _parse_hours(raw):
+    hours = []
+    for part in (raw or "").split(","):
+        part = part.strip()
+        if part.isdigit() and 0 <= int(part) <= 23 and int(part) not in hours:
+            hours.append(int(part))
+    return sorted(hours) if len(hours) == 3 else [9, 14, 21]
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("timezone", sa.String(length=64), nullable=True))
+
+    op.create_table(
+        "reminder_slots",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("timezone", sa.String(length=64), nullable=False),
+        sa.Column("local_hour", sa.Integer(), nullable=False),
+        sa.Column("slot", sa.String(length=16), nullable=False),
+        sa.UniqueConstraint("user_id", "local_hour", name="uq_reminder_slot_user_hour"),
+    )
+    op.create_index("ix_reminder_slots_user_id", "reminder_slots", ["user_id"])
+    op.create_index("ix_reminder_slots_tz_hour", "reminder_slots", ["timezone", "local_hour"])
+
+    default_tz = os.getenv("BOT_TIMEZONE", "Asia/Tashkent")
+    try:
+        ZoneInfo(default_tz)
+    except Exception:
+        default_tz = "UTC"
+
+    bind = op.get_bind()
+    users = sa.table("users", sa.column("id", sa.Integer()), sa.column("reminder_hours_json", sa.String()))
+    slots = sa.table(
+        "reminder_slots",
+        sa.column("user_id", sa.Integer()),
+        sa.column("timezone", sa.String()),
+        sa.column("local_hour", sa.Integer()),
+        sa.column("slot", sa.String()),
+    )
+    rows = []
+    for user_id, raw_hours in bind.execute(sa.select(users.c.id, users.c.reminder_hours_json)).all():
+        if not raw_hours:
+            continue
+        for idx, hour in enumerate(_parse_hours(raw_hours)):
+            rows.append({"user_id": user_id, "timezone": default_tz, "local_hour": hour, "slot": SLOT_NAMES[idx]})
+    if rows:
+        op.bulk_insert(slots, rows)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_reminder_slots_tz_hour", table_name="reminder_slots")
+    op.drop_index("ix_reminder_slots_user_id", table_name="reminder_slots")
+    op.drop_table("reminder_slots")
+
+    op.drop_column("users", "timezone")
@@ -0,0 +1,46 @@
+"""durable outbox for outgoing bot messages
+
+Revision ID: 20261017_0010
+Revises: 20261017_0009
+Create Date: 2026-10-17 10:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261017_0010"
+down_revision = "20261017_0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "outbox",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("chat_id", sa.BigInteger(), nullable=False),
+        sa.Column("batch_key", sa.String(length=64), nullable=False),
+        sa.Column("dedupe_key", sa.String(length=128), nullable=False),
+        sa.Column("payload_json", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column("claim_token", sa.String(length=36), nullable=True),
+        sa.Column("last_error", sa.String(length=64), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("dedupe_key", name="uq_outbox_dedupe_key"),
+    )
+    op.create_index("ix_outbox_chat_id", "outbox", ["chat_id"])
+    op.create_index("ix_outbox_batch_key", "outbox", ["batch_key"])
+    op.create_index("ix_outbox_claim_token", "outbox", ["claim_token"])
+    op.create_index("ix_outbox_status_next_attempt", "outbox", ["status", "next_attempt_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_outbox_status_next_attempt", table_name="outbox")
+    op.drop_index("ix_outbox_claim_token", table_name="outbox")
+    op.drop_index("ix_outbox_batch_key", table_name="outbox")
+    op.drop_index("ix_outbox_chat_id", table_name="outbox")
+    op.drop_table("outbox")
@@ -0,0 +1,26 @@
+"""covering index for per-user report aggregates by date range
+
+Revision ID: 20261017_0011
+Revises: 20261017_0010
+Create Date: 2026-10-17 11:00:00
+"""
+
+from alembic import op
+
+
+revision = "20261017_0011"
+down_revision = "20261017_0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_daily_module_reports_date_user_done",
+        "daily_module_reports",
+        ["report_date", "user_id", "is_done"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_daily_module_reports_date_user_done", table_name="daily_module_reports")
@@ -0,0 +1,28 @@
+"""index users.last_report_date and backfill it from module reports
+
+Revision ID: 20261017_0012
+Revises: 20261017_0011
+Create Date: 2026-10-17 12:00:00
+"""
+
+from alembic import op
+
+
+revision = "20261017_0012"
+down_revision = "20261017_0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "UPDATE users SET last_report_date = ("
+        "SELECT MAX(daily_module_reports.report_date) FROM daily_module_reports "
+        "WHERE daily_module_reports.user_id = users.id"
+        ") WHERE last_report_date IS NULL"
+    )
+    op.create_index("ix_users_last_report_date", "users", ["last_report_date"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_last_report_date", table_name="users")
@@ -0,0 +1,45 @@
+"""per-run metrics for scheduled bot jobs
+
+Revision ID: 20261017_0015
+Revises: 20261017_0014
+Create Date: 2026-10-17 15:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261017_0015"
+down_revision = "20261017_0014"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "job_runs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("job_name", sa.String(length=64), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False, server_default="ok"),
+        sa.Column("error", sa.String(length=255), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("duration_ms", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("users_scanned", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("messages_queued", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("messages_sent", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("messages_failed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("errors_json", sa.Text(), nullable=True),
+        sa.Column("db_ms", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("send_ms", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("send_p50_ms", sa.Integer(), nullable=True),
+        sa.Column("send_p95_ms", sa.Integer(), nullable=True),
+    )
+    op.create_index("ix_job_runs_started_at", "job_runs", ["started_at"])
+    op.create_index("ix_job_runs_job_started", "job_runs", ["job_name", "started_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_job_runs_job_started", table_name="job_runs")
+    op.drop_index("ix_job_runs_started_at", table_name="job_runs")
+    op.drop_table("job_runs")
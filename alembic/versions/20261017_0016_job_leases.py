@@ -0,0 +1,40 @@
+"""shard leases and worker heartbeats for multi-worker bot jobs
+
+Revision ID: 20261017_0016
+Revises: 20261017_0015
+Create Date: 2026-10-17 16:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261017_0016"
+down_revision = "20261017_0015"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "job_leases",
+        sa.Column("shard", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("owner", sa.String(length=64), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+        sa.Column("acquired_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_job_leases_owner", "job_leases", ["owner"])
+    op.create_table(
+        "job_workers",
+        sa.Column("worker_id", sa.String(length=64), primary_key=True),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column("started_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_job_workers_heartbeat_at", "job_workers", ["heartbeat_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_job_workers_heartbeat_at", table_name="job_workers")
+    op.drop_table("job_workers")
+    op.drop_index("ix_job_leases_owner", table_name="job_leases")
+    op.drop_table("job_leases")
@@ -0,0 +1,37 @@
+"""per-day submission ledger written by the day-close job
+
+Revision ID: 20261017_0017
+Revises: 20261017_0016
+Create Date: 2026-10-17 17:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261017_0017"
+down_revision = "20261017_0016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_submissions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("report_date", sa.Date(), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("submitted", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("done", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.UniqueConstraint("report_date", "user_id", name="uq_daily_submission_date_user"),
+    )
+    op.create_index("ix_daily_submissions_user_id", "daily_submissions", ["user_id"])
+    op.create_index("ix_daily_submissions_date_submitted", "daily_submissions", ["report_date", "submitted"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_daily_submissions_date_submitted", table_name="daily_submissions")
+    op.drop_index("ix_daily_submissions_user_id", table_name="daily_submissions")
+    op.drop_table("daily_submissions")
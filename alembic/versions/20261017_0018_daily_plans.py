@@ -0,0 +1,35 @@
+"""materialized per-day user plans
+
+Revision ID: 20261017_0018
+Revises: 20261017_0017
+Create Date: 2026-10-17 18:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261017_0018"
+down_revision = "20261017_0017"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_plans",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("plan_date", sa.Date(), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("plan_json", sa.Text(), nullable=False),
+        sa.Column("modules", sa.String(length=64), nullable=False, server_default=""),
+        sa.Column("total_items", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.UniqueConstraint("plan_date", "user_id", name="uq_daily_plan_date_user"),
+    )
+    op.create_index("ix_daily_plans_user_id", "daily_plans", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_daily_plans_user_id", table_name="daily_plans")
+    op.drop_table("daily_plans")
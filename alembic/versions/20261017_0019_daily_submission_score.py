@@ -0,0 +1,37 @@
+"""daily_submissions: weighted score, backfilled from existing reports
+
+Revision ID: 20261017_0019
+Revises: 20261017_0018
+Create Date: 2026-10-17 19:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261017_0019"
+down_revision = "20261017_0018"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("daily_submissions", sa.Column("score", sa.Integer(), nullable=True))
+    # Days reported before the ledger was written on submit.
+    op.execute(
+        """
+        INSERT INTO daily_submissions (report_date, user_id, submitted, done, total, created_at)
+        SELECT r.report_date, r.user_id, TRUE,
+               SUM(CASE WHEN r.is_done THEN 1 ELSE 0 END), COUNT(*), CURRENT_TIMESTAMP
+        FROM daily_module_reports r
+        WHERE NOT EXISTS (
+            SELECT 1 FROM daily_submissions s
+            WHERE s.report_date = r.report_date AND s.user_id = r.user_id
+        )
+        GROUP BY r.report_date, r.user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("daily_submissions", "score")
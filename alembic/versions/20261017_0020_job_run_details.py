@@ -0,0 +1,23 @@
+"""job_runs: per-job result counts
+
+Revision ID: 20261017_0020
+Revises: 20261017_0019
+Create Date: 2026-10-17 20:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261017_0020"
+down_revision = "20261017_0019"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("job_runs", sa.Column("details_json", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("job_runs", "details_json")
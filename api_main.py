@@ -5,7 +5,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api import router
 from app.config import settings
 from app.crud import seed_habits_if_empty
-from app.db import SessionLocal, engine
+from app.db import SessionLocal, async_engine, engine, replica_async_engine
+from app.db_writer import stop_writer
 from app.models import Base
 
 app = FastAPI(title="Intizomli API", version="0.1.0")
@@ -18,6 +19,14 @@ app.add_middleware(
 )
 app.include_router(router)
 
+if settings.BOT_WEBHOOK_IN_API:
+    # Telegram updates served by this API process (role=updates); run the jobs
+    # in a separate `python main.py --role=jobs`.
+    from app.bot import attach_webhook
+    from main import build_application
+
+    attach_webhook(app, build_application("updates"))
+
 
 @app.get("/health/live")
 def health_live() -> dict[str, str]:
@@ -38,3 +47,12 @@ def on_startup() -> None:
 
     with SessionLocal() as db:
         seed_habits_if_empty(db)
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    stop_writer()
+    if async_engine is not None:
+        await async_engine.dispose()
+    if replica_async_engine is not None:
+        await replica_async_engine.dispose()
@@ -8,9 +8,11 @@ from fastapi import APIRouter, Depends, Header, HTTPException
 from sqlalchemy import Integer, and_, func, select
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db
+from app.api.deps import get_db, get_read_db
+from app.bot import broadcast_delivery_counts, broadcast_segment
 from app.config import settings
-from app.models import ActivationCode, AuditLog, DailyModuleReport, PaymentTransaction, User
+from app.crud import count_segment, create_broadcast, get_missed_users, parse_segment
+from app.models import ActivationCode, AuditLog, Broadcast, DailyModuleReport, JobRun, PaymentTransaction, User
 
 router = APIRouter(prefix="/v1/admin", tags=["admin"])
 
@@ -190,7 +192,7 @@ def admin_codes_bulk(
 def admin_analytics_overview(
     days: int = 14,
     _: None = Depends(_require_admin),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ) -> Dict[str, Any]:
     days = max(1, min(days, 90))
     start = date.today().fromordinal(date.today().toordinal() - (days - 1))
@@ -251,16 +253,7 @@ def admin_reports_missed(
         except ValueError as exc:
             raise HTTPException(status_code=400, detail="report_date format: YYYY-MM-DD") from exc
 
-    paid_users = list(db.scalars(select(User).where(User.payment_status == "paid")))
-    submitted_ids = set(
-        db.scalars(
-            select(DailyModuleReport.user_id)
-            .where(DailyModuleReport.report_date == target_date)
-            .group_by(DailyModuleReport.user_id)
-        )
-    )
-
-    missing = [u for u in paid_users if u.id not in submitted_ids]
+    missing = get_missed_users(db, target_date)
     return {
         "report_date": target_date.isoformat(),
         "count": len(missing),
@@ -277,8 +270,48 @@ def admin_reports_missed(
     }
 
 
+@router.get("/jobs")
+def admin_jobs(
+    limit: int = 50,
+    job_name: Optional[str] = None,
+    _: None = Depends(_require_admin),
+    db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    limit = max(1, min(limit, 500))
+
+    query = select(JobRun).order_by(JobRun.started_at.desc()).limit(limit)
+    if job_name:
+        query = query.where(JobRun.job_name == job_name)
+
+    runs = list(db.scalars(query))
+    return {
+        "count": len(runs),
+        "items": [
+            {
+                "id": r.id,
+                "job_name": r.job_name,
+                "status": r.status,
+                "error": r.error,
+                "started_at": r.started_at.isoformat() if r.started_at else None,
+                "duration_ms": r.duration_ms,
+                "users_scanned": r.users_scanned,
+                "messages_queued": r.messages_queued,
+                "messages_sent": r.messages_sent,
+                "messages_failed": r.messages_failed,
+                "errors": json.loads(r.errors_json) if r.errors_json else {},
+                "details": json.loads(r.details_json) if r.details_json else {},
+                "db_ms": r.db_ms,
+                "send_ms": r.send_ms,
+                "send_p50_ms": r.send_p50_ms,
+                "send_p95_ms": r.send_p95_ms,
+            }
+            for r in runs
+        ],
+    }
+
+
 @router.get("/backup/export")
-def admin_backup_export(_: None = Depends(_require_admin), db: Session = Depends(get_db)) -> Dict[str, Any]:
+def admin_backup_export(_: None = Depends(_require_admin), db: Session = Depends(get_read_db)) -> Dict[str, Any]:
     users = list(db.scalars(select(User)))
     codes = list(db.scalars(select(ActivationCode)))
     txs = list(db.scalars(select(PaymentTransaction)))
@@ -382,3 +415,86 @@ def admin_user_rollback(
     )
     db.commit()
     return {"ok": True, "tg_user_id": tg_user_id, "status": user.status}
+
+
+def _broadcast_payload(broadcast: Broadcast) -> Dict[str, Any]:
+    return {
+        "id": broadcast.id,
+        "status": broadcast.status,
+        "segment": broadcast_segment(broadcast),
+        "total": broadcast.total,
+        "sent": broadcast.sent,
+        "failed": broadcast.failed,
+        "created_at": broadcast.created_at.isoformat() if broadcast.created_at else None,
+        "finished_at": broadcast.finished_at.isoformat() if broadcast.finished_at else None,
+    }
+
+
+@router.post("/broadcasts")
+def admin_broadcast_create(
+    payload: Dict[str, Any],
+    _: None = Depends(_require_admin),
+    db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    try:
+        segment = parse_segment(payload.get("segment"))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if payload.get("dry_run"):
+        return {"ok": True, "dry_run": True, "segment": segment, "count": count_segment(db, segment)}
+
+    text = str(payload.get("text") or "").strip()
+    if not text or len(text) > 4000:
+        raise HTTPException(status_code=400, detail="text 1..4000 belgi bo'lishi kerak")
+
+    # Only the row is written here; the bot's broadcast-progress job fans it
+    # out into the outbox and drains it at the throttled rate.
+    broadcast = create_broadcast(db, text, segment, status="queued")
+    db.add(
+        AuditLog(
+            actor_tg_user_id=None,
+            action="admin_broadcast",
+            payload_json=json.dumps({"broadcast_id": broadcast.id, "segment": segment}, ensure_ascii=False),
+        )
+    )
+    db.commit()
+    return {"ok": True, **_broadcast_payload(broadcast)}
+
+
+@router.get("/broadcasts/{broadcast_id}")
+def admin_broadcast_get(
+    broadcast_id: int,
+    _: None = Depends(_require_admin),
+    db: Session = Depends(get_read_db),
+) -> Dict[str, Any]:
+    broadcast = db.get(Broadcast, broadcast_id)
+    if not broadcast:
+        raise HTTPException(status_code=404, detail="broadcast not found")
+    if broadcast.status == "done":
+        # Final counts are stored; the outbox rows may already be pruned.
+        return _broadcast_payload(broadcast)
+    # Live counts without writing; status changes are left to the bot job.
+    sent, failed = broadcast_delivery_counts(db, broadcast.id)
+    return {**_broadcast_payload(broadcast), "sent": sent, "failed": failed}
+
+
+@router.post("/broadcasts/{broadcast_id}/resume")
+def admin_broadcast_resume(
+    broadcast_id: int,
+    _: None = Depends(_require_admin),
+    db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    broadcast = db.get(Broadcast, broadcast_id)
+    if not broadcast:
+        raise HTTPException(status_code=404, detail="broadcast not found")
+    if broadcast.status == "done":
+        # Its sent rows (and their dedupe keys) may be pruned already, so a
+        # resume could deliver the text twice.
+        raise HTTPException(status_code=400, detail="broadcast already finished")
+    # Handed back to the bot job; already-queued chats are skipped by the
+    # outbox dedupe key.
+    broadcast.status = "queued"
+    broadcast.finished_at = None
+    db.add(broadcast)
+    db.commit()
+    return {"ok": True, **_broadcast_payload(broadcast)}
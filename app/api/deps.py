@@ -1,8 +1,14 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Callable, Generator
+from typing import Any, Optional, TypeVar, Union
 
+from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.db import SessionLocal
+from app.db import AsyncSessionLocal, SessionLocal, mark_read_only
+
+T = TypeVar("T")
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -11,3 +17,45 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+class ThreadedSession:
+    # Same run_sync() interface as AsyncSession for engines without an async
+    # driver (SQLite): the sync work runs on Starlette's threadpool instead.
+    def __init__(self, session: Session) -> None:
+        self.session = session
+
+    async def run_sync(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+
+async def get_async_db() -> AsyncGenerator[Union[AsyncSession, ThreadedSession], None]:
+    # Async endpoints call `await db.run_sync(fn, ...)`; on Postgres the ORM code
+    # in fn awaits the connection on the event loop instead of holding a thread.
+    if AsyncSessionLocal is None:
+        db = SessionLocal()
+        try:
+            yield ThreadedSession(db)
+        finally:
+            db.close()
+        return
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _sticky_key(request: Request) -> Optional[str]:
+    return request.path_params.get("tg_user_id") or request.query_params.get("tg_user_id")
+
+
+def get_read_db(request: Request, db: Session = Depends(get_db)) -> Session:
+    # For read-only routes: SELECTs go to DATABASE_REPLICA_URL when it is set,
+    # except for a user who wrote within DB_REPLICA_STICKY_SEC.
+    mark_read_only(db, _sticky_key(request))
+    return db
+
+
+def get_async_read_db(
+    request: Request, db: Union[AsyncSession, ThreadedSession] = Depends(get_async_db)
+) -> Union[AsyncSession, ThreadedSession]:
+    mark_read_only(db.session if isinstance(db, ThreadedSession) else db, _sticky_key(request))
+    return db
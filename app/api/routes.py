@@ -8,10 +8,23 @@ from urllib.parse import parse_qs, urlencode
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Request
 from sqlalchemy import Integer, and_, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db
-from app.crud import get_referral_count, upsert_user
+from app.api.deps import get_async_db, get_async_read_db, get_db
+from app.db import stick_to_primary
+from app.db_writer import commit_write
+from app.crud import (
+    WEEKDAY_KEYS,
+    get_daily_plan,
+    get_referral_count,
+    invalidate_daily_plan,
+    normalize_days,
+    record_submission,
+    sync_reminder_slots,
+    upsert_user,
+    valid_timezone,
+)
 from app.models import ActivationCode, AuditLog, Challenge, DailyModuleReport, PaymentTransaction, User, UserAchievement
 
 router = APIRouter()
@@ -109,7 +122,6 @@ CHALLENGE_POOL = {
     9: "Erta uyqu",
     10: "Tongda yugurish",
 }
-WEEKDAY_KEYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
 WEEKDAY_UZ = {
     "mon": "Dushanba",
     "tue": "Seshanba",
@@ -146,29 +158,6 @@ def _loads_any_json(value: Optional[str], default: Any) -> Any:
         return default
 
 
-def _normalize_days(raw_days: Any) -> List[str]:
-    if not isinstance(raw_days, list):
-        return ["daily"]
-    days: List[str] = []
-    for item in raw_days:
-        val = str(item).strip().lower()
-        if val == "daily":
-            return ["daily"]
-        if val in WEEKDAY_KEYS and val not in days:
-            days.append(val)
-    return days or ["daily"]
-
-
-def _today_day_key() -> str:
-    return WEEKDAY_KEYS[date.today().weekday()]
-
-
-def _is_today_selected(days: List[str]) -> bool:
-    if "daily" in days:
-        return True
-    return _today_day_key() in days
-
-
 def _get_user_or_404(db: Session, tg_user_id: int) -> User:
     user = db.scalar(select(User).where(User.tg_user_id == tg_user_id))
     if not user:
@@ -219,15 +208,30 @@ def _weighted_daily_score(done_by_module: Dict[str, int], total_by_module: Dict[
     return int(round(score))
 
 
-def _issue_certificate_if_ready(user: User) -> None:
+def _certificate_code(user: User) -> Optional[str]:
     day_no = _marathon_day(user)
     if user.certificate_issued:
-        return
+        return None
     if day_no < user.marathon_days:
-        return
-    code = f"CERT-{user.tg_user_id}-{day_no}"
-    user.certificate_issued = True
-    user.certificate_code = code
+        return None
+    return f"CERT-{user.tg_user_id}-{day_no}"
+
+
+def _issue_certificate_if_ready(user: User) -> None:
+    code = _certificate_code(user)
+    if code:
+        user.certificate_issued = True
+        user.certificate_code = code
+
+
+def _issue_certificate(db: Session, user_id: int) -> None:
+    _issue_certificate_if_ready(db.get(User, user_id))
+
+
+def _store_certificate_if_ready(db: Session, user: User) -> None:
+    # Read paths only write (and commit) on the request that earns it.
+    if _certificate_code(user):
+        commit_write(db, _issue_certificate, user.id)
 
 
 ACHIEVEMENTS = [
@@ -389,66 +393,25 @@ async def _parse_click_payload(request: Request) -> Dict[str, str]:
     return {k: v[0] for k, v in parse_qs(body, keep_blank_values=True).items()}
 
 
-def _daily_items_for_user(db: Session, user: User) -> Dict[str, List[str]]:
-    modules = _loads(user.selected_modules_json)
-    result: Dict[str, List[str]] = {}
-
-    if "habits" in modules:
-        habits_raw = _loads_any_json(user.habits_json, [])
-        habits_items: List[str] = []
-        if habits_raw and isinstance(habits_raw[0], str):
-            habits_items = [str(x) for x in habits_raw]
-        else:
-            for item in habits_raw:
-                name = str((item or {}).get("name", "")).strip()
-                days = _normalize_days((item or {}).get("days", ["daily"]))
-                if name and _is_today_selected(days):
-                    habits_items.append(name)
-        result["habits"] = habits_items
-    if "sports" in modules:
-        sports_raw = _loads_any_json(user.sports_json, [])
-        sports_items: List[str] = []
-        if sports_raw and isinstance(sports_raw[0], str):
-            sports_items = [str(x) for x in sports_raw]
-        else:
-            for item in sports_raw:
-                name = str((item or {}).get("name", "")).strip()
-                days = _normalize_days((item or {}).get("days", ["daily"]))
-                target = (item or {}).get("target_count")
-                if not name or not _is_today_selected(days):
-                    continue
-                if isinstance(target, int) and target > 0:
-                    sports_items.append(f"{name} ({target} marta)")
-                else:
-                    sports_items.append(name)
-        result["sports"] = sports_items
-    if "reading" in modules:
-        result["reading"] = [f"{user.reading_book or 'Intizom kuchi'} — {user.reading_task or '30 bet'}"]
-
-    day_no = _marathon_day(user)
-    if "challenge" in modules and day_no >= 5:
-        challenge = db.scalar(
-            select(Challenge)
-            .where(Challenge.user_id == user.id)
-            .where(Challenge.status == "active")
-            .order_by(Challenge.id.desc())
-        )
-        if challenge and challenge.start_date <= date.today() <= challenge.end_date:
-            try:
-                result["challenge"] = json.loads(challenge.tasks_json)
-            except Exception:
-                result["challenge"] = []
-
-    return {k: v for k, v in result.items() if v}
-
-
 @router.get("/health")
 def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
 @router.post("/v1/app/bootstrap")
-def app_bootstrap(payload: Dict[str, Any], db: Session = Depends(get_db)) -> Dict[str, Any]:
+async def app_bootstrap(payload: Dict[str, Any], db: AsyncSession = Depends(get_async_db)) -> Dict[str, Any]:
+    return await db.run_sync(_app_bootstrap, payload)
+
+
+def _bind_device(db: Session, user_id: int, device_id: str) -> None:
+    user = db.get(User, user_id)
+    if not user.device_fingerprint:
+        user.device_fingerprint = device_id
+        user.device_bound_at = datetime.utcnow()
+        db.add(user)
+
+
+def _app_bootstrap(db: Session, payload: Dict[str, Any]) -> Dict[str, Any]:
     tg_user_id = int(payload.get("tg_user_id", 0))
     if not tg_user_id:
         raise HTTPException(status_code=400, detail="tg_user_id required")
@@ -458,10 +421,7 @@ def app_bootstrap(payload: Dict[str, Any], db: Session = Depends(get_db)) -> Dic
     if user.device_fingerprint and device_id and user.device_fingerprint != device_id:
         raise HTTPException(status_code=403, detail="Bu akkaunt boshqa qurilmaga bog'langan.")
     if not user.device_fingerprint and device_id:
-        user.device_fingerprint = device_id
-        user.device_bound_at = datetime.utcnow()
-        db.add(user)
-        db.commit()
+        commit_write(db, _bind_device, user.id, device_id)
     referral_count = get_referral_count(db, tg_user_id)
 
     return {
@@ -560,7 +520,7 @@ def app_setup(payload: Dict[str, Any], db: Session = Depends(get_db)) -> Dict[st
                 days = ["daily"]
             else:
                 name = str((item or {}).get("name", "")).strip()
-                days = _normalize_days((item or {}).get("days", ["daily"]))
+                days = normalize_days((item or {}).get("days", ["daily"]))
             if not name:
                 continue
             habits_plan.append({"name": name, "days": days})
@@ -578,7 +538,7 @@ def app_setup(payload: Dict[str, Any], db: Session = Depends(get_db)) -> Dict[st
                 target = None
             else:
                 name = str((item or {}).get("name", "")).strip()
-                days = _normalize_days((item or {}).get("days", ["daily"]))
+                days = normalize_days((item or {}).get("days", ["daily"]))
                 target_raw = (item or {}).get("target_count")
                 try:
                     target = int(target_raw) if target_raw not in (None, "", 0) else None
@@ -616,10 +576,15 @@ def app_setup(payload: Dict[str, Any], db: Session = Depends(get_db)) -> Dict[st
     if len(reminder_hours_unique) != 3:
         raise HTTPException(status_code=400, detail="exactly 3 reminder hours required")
     user.reminder_hours_json = ",".join([str(x) for x in reminder_hours_unique])
+    tz_name = valid_timezone(payload.get("timezone"))
+    if tz_name:
+        user.timezone = tz_name
     user.onboarding_completed = True
     user.status = "setup_done"
 
     db.add(user)
+    sync_reminder_slots(db, user)
+    invalidate_daily_plan(db, user.id)
     db.commit()
 
     return {
@@ -1095,7 +1060,11 @@ async def payment_click_merchant(request: Request, db: Session = Depends(get_db)
 
 
 @router.get("/v1/app/state/{tg_user_id}")
-def app_state(tg_user_id: int, db: Session = Depends(get_db)) -> Dict[str, Any]:
+async def app_state(tg_user_id: int, db: AsyncSession = Depends(get_async_db)) -> Dict[str, Any]:
+    return await db.run_sync(_app_state, tg_user_id)
+
+
+def _app_state(db: Session, tg_user_id: int) -> Dict[str, Any]:
     user = _get_user_or_404(db, tg_user_id)
     modules = _loads(user.selected_modules_json)
     habits_raw = _loads_any_json(user.habits_json, [])
@@ -1111,9 +1080,7 @@ def app_state(tg_user_id: int, db: Session = Depends(get_db)) -> Dict[str, Any]:
         except Exception:
             reading_pages = 30
     level = _level_from_points(user.rating_points or 0)
-    _issue_certificate_if_ready(user)
-    db.add(user)
-    db.commit()
+    _store_certificate_if_ready(db, user)
     achievements = list(
         db.scalars(
             select(UserAchievement)
@@ -1165,14 +1132,18 @@ def app_state(tg_user_id: int, db: Session = Depends(get_db)) -> Dict[str, Any]:
 
 
 @router.get("/v1/app/daily/{tg_user_id}")
-def app_daily(tg_user_id: int, db: Session = Depends(get_db)) -> Dict[str, Any]:
+async def app_daily(tg_user_id: int, db: AsyncSession = Depends(get_async_db)) -> Dict[str, Any]:
+    return await db.run_sync(_app_daily, tg_user_id)
+
+
+def _app_daily(db: Session, tg_user_id: int) -> Dict[str, Any]:
     user = _get_user_or_404(db, tg_user_id)
     if not _is_active(user):
         if user.marathon_start_date and date.today() < user.marathon_start_date:
             raise HTTPException(status_code=400, detail=f"Marafon {user.marathon_start_date.isoformat()} sanadan boshlanadi.")
         raise HTTPException(status_code=400, detail="marathon not active")
 
-    plan = _daily_items_for_user(db, user)
+    plan = get_daily_plan(db, user)
     today = date.today()
     rows = db.execute(
         select(DailyModuleReport.module, DailyModuleReport.item_key, DailyModuleReport.is_done).where(
@@ -1190,7 +1161,11 @@ def app_daily(tg_user_id: int, db: Session = Depends(get_db)) -> Dict[str, Any]:
 
 
 @router.post("/v1/app/daily/report")
-def app_daily_report(payload: Dict[str, Any], db: Session = Depends(get_db)) -> Dict[str, Any]:
+async def app_daily_report(payload: Dict[str, Any], db: AsyncSession = Depends(get_async_db)) -> Dict[str, Any]:
+    return await db.run_sync(_app_daily_report, payload)
+
+
+def _app_daily_report(db: Session, payload: Dict[str, Any]) -> Dict[str, Any]:
     user = _get_user_or_404(db, int(payload.get("tg_user_id", 0)))
     if not _is_active(user):
         if user.marathon_start_date and date.today() < user.marathon_start_date:
@@ -1201,9 +1176,16 @@ def app_daily_report(payload: Dict[str, Any], db: Session = Depends(get_db)) ->
     if not isinstance(checked, dict):
         raise HTTPException(status_code=400, detail="checked must be object")
 
-    report_date = date.today()
-    plan = _daily_items_for_user(db, user)
+    plan = get_daily_plan(db, user)
+    result = commit_write(db, _save_daily_report, user.id, plan, checked)
+    # Progress and leaderboard may read from a lagging replica.
+    stick_to_primary(payload.get("tg_user_id"))
+    return result
+
 
+def _save_daily_report(db: Session, user_id: int, plan: Dict[str, List[str]], checked: Dict[str, List[str]]) -> Dict[str, Any]:
+    user = db.get(User, user_id)
+    report_date = date.today()
     db.execute(
         delete(DailyModuleReport).where(
             and_(DailyModuleReport.user_id == user.id, DailyModuleReport.report_date == report_date)
@@ -1256,6 +1238,7 @@ def app_daily_report(payload: Dict[str, Any], db: Session = Depends(get_db)) ->
             user.current_streak = 0
 
     user.last_report_date = report_date
+    record_submission(db, user.id, report_date, done, total, weighted_score)
     _issue_certificate_if_ready(user)
     awarded: List[str] = []
     if user.current_streak >= 7 and _grant_achievement(db, user, "streak_7"):
@@ -1296,7 +1279,6 @@ def app_daily_report(payload: Dict[str, Any], db: Session = Depends(get_db)) ->
             "awarded": awarded,
         },
     )
-    db.commit()
 
     return {
         "ok": True,
@@ -1343,13 +1325,18 @@ def app_challenge_pick(payload: Dict[str, Any], db: Session = Depends(get_db)) -
             status="active",
         )
     )
+    invalidate_daily_plan(db, user.id)
     db.commit()
 
     return {"ok": True, "numbers": nums, "tasks": tasks, "deadline": end.isoformat()}
 
 
 @router.get("/v1/app/progress/{tg_user_id}")
-def app_progress(tg_user_id: int, db: Session = Depends(get_db)) -> Dict[str, Any]:
+async def app_progress(tg_user_id: int, db: AsyncSession = Depends(get_async_read_db)) -> Dict[str, Any]:
+    return await db.run_sync(_app_progress, tg_user_id)
+
+
+def _app_progress(db: Session, tg_user_id: int) -> Dict[str, Any]:
     user = _get_user_or_404(db, tg_user_id)
     start = date.today() - timedelta(days=24)
 
@@ -1432,7 +1419,11 @@ def app_progress(tg_user_id: int, db: Session = Depends(get_db)) -> Dict[str, An
 
 
 @router.get("/v1/app/leaderboard")
-def app_leaderboard(limit: int = 10, db: Session = Depends(get_db)) -> Dict[str, Any]:
+async def app_leaderboard(limit: int = 10, db: AsyncSession = Depends(get_async_read_db)) -> Dict[str, Any]:
+    return await db.run_sync(_app_leaderboard, limit)
+
+
+def _app_leaderboard(db: Session, limit: int) -> Dict[str, Any]:
     limit = max(3, min(limit, 50))
     users = list(
         db.scalars(
@@ -1462,9 +1453,7 @@ def app_leaderboard(limit: int = 10, db: Session = Depends(get_db)) -> Dict[str,
 @router.get("/v1/app/certificate/{tg_user_id}")
 def app_certificate(tg_user_id: int, db: Session = Depends(get_db)) -> Dict[str, Any]:
     user = _get_user_or_404(db, tg_user_id)
-    _issue_certificate_if_ready(user)
-    db.add(user)
-    db.commit()
+    _store_certificate_if_ready(db, user)
     if not user.certificate_issued:
         raise HTTPException(status_code=400, detail="certificate not ready")
     return {
@@ -1488,9 +1477,7 @@ def app_certificate(tg_user_id: int, db: Session = Depends(get_db)) -> Dict[str,
 def profile(tg_user_id: int, db: Session = Depends(get_db)) -> Dict[str, Any]:
     user = _get_user_or_404(db, tg_user_id)
     day_no = _marathon_day(user)
-    _issue_certificate_if_ready(user)
-    db.add(user)
-    db.commit()
+    _store_certificate_if_ready(db, user)
     return {
         "tg_user_id": tg_user_id,
         "full_name": user.full_name,
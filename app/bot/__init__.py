@@ -0,0 +1,64 @@
+from app.bot.broadcast import (
+    broadcast_batch_key,
+    broadcast_delivery_counts,
+    broadcast_progress_text,
+    broadcast_segment,
+    enqueue_broadcast_chunk,
+    finish_broadcast_enqueue,
+    refresh_broadcast_progress,
+)
+from app.bot.db_executor import run_db, run_read, run_write
+from app.bot.dispatcher import (
+    PERMANENT_ERRORS,
+    UNDELIVERABLE_ERRORS,
+    DispatchResult,
+    Dispatcher,
+    OutgoingMessage,
+    TokenBucket,
+    dispatcher,
+)
+from app.bot.job_runs import JobRunStats, track_job_run
+from app.bot.shards import begin_leasing, heartbeat_leases, owned_shards, owns_global_jobs, release_leases, shard_criteria
+from app.bot.outbox import drain_outbox, enqueue_messages, prune_outbox
+from app.bot.user_cache import CachedUser, UserCache, snapshot_user, user_cache
+from app.bot.webhook import attach_webhook, build_webhook_api, create_webhook_router, start_webhook, stop_webhook
+
+__all__ = [
+    "CachedUser",
+    "Dispatcher",
+    "DispatchResult",
+    "JobRunStats",
+    "OutgoingMessage",
+    "PERMANENT_ERRORS",
+    "TokenBucket",
+    "UNDELIVERABLE_ERRORS",
+    "UserCache",
+    "attach_webhook",
+    "begin_leasing",
+    "broadcast_batch_key",
+    "broadcast_delivery_counts",
+    "broadcast_progress_text",
+    "broadcast_segment",
+    "build_webhook_api",
+    "create_webhook_router",
+    "dispatcher",
+    "drain_outbox",
+    "enqueue_broadcast_chunk",
+    "enqueue_messages",
+    "finish_broadcast_enqueue",
+    "heartbeat_leases",
+    "owned_shards",
+    "owns_global_jobs",
+    "prune_outbox",
+    "refresh_broadcast_progress",
+    "release_leases",
+    "run_db",
+    "run_read",
+    "run_write",
+    "shard_criteria",
+    "start_webhook",
+    "stop_webhook",
+    "snapshot_user",
+    "track_job_run",
+    "user_cache",
+]
@@ -0,0 +1,81 @@
+import json
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.bot.dispatcher import OutgoingMessage
+from app.bot.outbox import enqueue_messages
+from app.models import Broadcast, OutboxMessage
+
+
+def broadcast_batch_key(broadcast_id: int) -> str:
+    return f"broadcast:{broadcast_id}"
+
+
+def broadcast_segment(broadcast: Broadcast) -> dict[str, Any]:
+    return json.loads(broadcast.segment_json or "{}")
+
+
+def enqueue_broadcast_chunk(db: Session, broadcast_id: int, text: str, rows: list) -> int:
+    # The outbox dedupes on (batch, chat), so re-running a half-enqueued
+    # broadcast only adds the users that were not queued yet.
+    messages = [OutgoingMessage(chat_id=row.tg_user_id, text=text) for row in rows]
+    return enqueue_messages(db, broadcast_batch_key(broadcast_id), messages)
+
+
+def finish_broadcast_enqueue(db: Session, broadcast: Broadcast) -> None:
+    broadcast.total = int(
+        db.scalar(
+            select(func.count())
+            .select_from(OutboxMessage)
+            .where(OutboxMessage.batch_key == broadcast_batch_key(broadcast.id))
+        )
+        or 0
+    )
+    broadcast.status = "sending"
+    db.add(broadcast)
+    db.commit()
+
+
+def broadcast_delivery_counts(db: Session, broadcast_id: int) -> tuple[int, int]:
+    # (sent, failed) straight from the outbox; read-only.
+    counts = dict(
+        db.execute(
+            select(OutboxMessage.status, func.count())
+            .where(OutboxMessage.batch_key == broadcast_batch_key(broadcast_id))
+            .group_by(OutboxMessage.status)
+        ).all()
+    )
+    return int(counts.get("sent", 0)), int(counts.get("failed", 0))
+
+
+def refresh_broadcast_progress(db: Session, broadcast: Broadcast) -> bool:
+    sent, failed = broadcast_delivery_counts(db, broadcast.id)
+    changed = (sent, failed) != (broadcast.sent, broadcast.failed)
+    broadcast.sent = sent
+    broadcast.failed = failed
+    if broadcast.status == "sending" and sent + failed >= broadcast.total:
+        broadcast.status = "done"
+        broadcast.finished_at = datetime.utcnow()
+        changed = True
+    if changed:
+        db.add(broadcast)
+        db.commit()
+    return changed
+
+
+def broadcast_progress_text(broadcast: Broadcast) -> str:
+    segment = broadcast_segment(broadcast)
+    filters = [f"module={segment['module']}"] if segment.get("module") else []
+    filters.append("paid" if segment.get("paid") else "hamma")
+    if segment.get("missed_days"):
+        filters.append(f"missed={segment['missed_days']}")
+    total = "…" if broadcast.status in ("queued", "enqueuing") else broadcast.total
+    return (
+        f"📣 Broadcast #{broadcast.id} ({', '.join(filters)})\n"
+        f"Holat: {broadcast.status}\n"
+        f"Yuborildi: {broadcast.sent}/{total}\n"
+        f"Xato: {broadcast.failed}"
+    )
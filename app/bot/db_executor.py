@@ -0,0 +1,44 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from app.config import settings
+from app.db import SessionLocal, mark_read_only
+from app.db_writer import WRITER_ENABLED, writer
+
+T = TypeVar("T")
+
+# Kept below the engine's pool size so handlers queue here instead of
+# holding a thread while they wait for a connection.
+_executor = ThreadPoolExecutor(max_workers=settings.BOT_DB_WORKERS, thread_name_prefix="bot-db")
+
+
+async def run_db(fn: Callable[..., T], *args: Any) -> T:
+    # Runs fn(db, *args) in its own session on the bounded DB thread pool, so a
+    # slow query never blocks the event loop. Return plain values or objects
+    # that are safe to read after the session closes.
+    def call() -> T:
+        with SessionLocal() as db:
+            return fn(db, *args)
+
+    return await asyncio.get_running_loop().run_in_executor(_executor, call)
+
+
+async def run_read(fn: Callable[..., T], *args: Any) -> T:
+    # run_db for job scans: SELECTs go to the replica when one is configured,
+    # while whatever fn writes (outbox rows, audit logs) still hits the primary.
+    def call() -> T:
+        with SessionLocal() as db:
+            mark_read_only(db)
+            return fn(db, *args)
+
+    return await asyncio.get_running_loop().run_in_executor(_executor, call)
+
+
+async def run_write(fn: Callable[..., T], *args: Any) -> T:
+    # Same contract as run_db for handlers that write. With DB_WRITER_ENABLED
+    # fn joins the writer's next group commit instead of taking its own write
+    # transaction; its commit() calls become savepoints of that batch.
+    if not WRITER_ENABLED:
+        return await run_db(fn, *args)
+    return await asyncio.wrap_future(writer.submit(fn, *args))
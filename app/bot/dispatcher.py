@@ -0,0 +1,178 @@
+import asyncio
+import io
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from telegram import InlineKeyboardMarkup
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+
+from app.config import settings
+
+# Chat can no longer receive messages (bot blocked, account deleted, chat gone).
+UNDELIVERABLE_ERRORS = {"Forbidden", "ChatNotFound"}
+# Errors that will not go away by retrying the same message later.
+PERMANENT_ERRORS = UNDELIVERABLE_ERRORS | {"BadRequest"}
+
+
+@dataclass
+class OutgoingMessage:
+    chat_id: int
+    text: str = ""
+    parse_mode: Optional[str] = None
+    reply_markup: Optional[InlineKeyboardMarkup] = None
+    document: Optional[bytes] = None
+    filename: Optional[str] = None
+    outbox_id: Optional[int] = None
+    not_before: Optional[datetime] = None
+
+
+@dataclass
+class DispatchResult:
+    sent: int = 0
+    failed: int = 0
+    errors: Dict[str, int] = field(default_factory=dict)
+    delivered: List[OutgoingMessage] = field(default_factory=list)
+    failures: List[Tuple[OutgoingMessage, str]] = field(default_factory=list)
+    latencies_ms: List[float] = field(default_factory=list)
+
+    def record_success(self, message: OutgoingMessage, latency_ms: float) -> None:
+        self.sent += 1
+        self.delivered.append(message)
+        self.latencies_ms.append(latency_ms)
+
+    def record_failure(self, message: OutgoingMessage, error: str) -> None:
+        self.failed += 1
+        self.errors[error] = self.errors.get(error, 0) + 1
+        self.failures.append((message, error))
+
+    def merge(self, other: "DispatchResult") -> None:
+        self.sent += other.sent
+        self.failed += other.failed
+        for error, count in other.errors.items():
+            self.errors[error] = self.errors.get(error, 0) + count
+        self.delivered.extend(other.delivered)
+        self.failures.extend(other.failures)
+        self.latencies_ms.extend(other.latencies_ms)
+
+
+class TokenBucket:
+    # Virtual-scheduling bucket: each acquire reserves the next free slot, so
+    # no lock is needed on a single event loop.
+    def __init__(self, rate_per_sec: float, burst: int = 1) -> None:
+        self.interval = 1.0 / max(rate_per_sec, 0.001)
+        self.burst = max(1, burst)
+        self._next_slot = 0.0
+
+    def reserve(self) -> float:
+        now = time.monotonic()
+        slot = max(self._next_slot, now - (self.burst - 1) * self.interval)
+        self._next_slot = slot + self.interval
+        return max(0.0, slot - now)
+
+    async def acquire(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        self._next_slot = max(self._next_slot, time.monotonic() + seconds)
+
+
+class Dispatcher:
+    def __init__(
+        self,
+        rate_per_sec: float = 28.0,
+        concurrency: int = 16,
+        chat_min_interval: float = 1.0,
+        max_retries: int = 3,
+    ) -> None:
+        self.bucket = TokenBucket(rate_per_sec, burst=max(1, int(rate_per_sec)))
+        self.concurrency = max(1, concurrency)
+        self.chat_min_interval = max(0.0, chat_min_interval)
+        self.max_retries = max(0, max_retries)
+        self._chat_next: Dict[int, float] = {}
+
+    async def _wait_for_chat(self, chat_id: int) -> None:
+        now = time.monotonic()
+        if len(self._chat_next) > 10000:
+            self._chat_next = {cid: t for cid, t in self._chat_next.items() if t > now}
+        slot = max(now, self._chat_next.get(chat_id, 0.0))
+        self._chat_next[chat_id] = slot + self.chat_min_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _call(self, bot: Any, message: OutgoingMessage) -> Any:
+        if message.document is not None:
+            buf = io.BytesIO(message.document)
+            buf.name = message.filename or "document"
+            return await bot.send_document(
+                chat_id=message.chat_id,
+                document=buf,
+                caption=message.text or None,
+                parse_mode=message.parse_mode,
+            )
+        return await bot.send_message(
+            chat_id=message.chat_id,
+            text=message.text,
+            parse_mode=message.parse_mode,
+            reply_markup=message.reply_markup,
+        )
+
+    async def send(self, bot: Any, message: OutgoingMessage) -> Tuple[Optional[str], float]:
+        # Returns (error class name or None, latency of the successful call in ms).
+        attempt = 0
+        flood_waits = 0
+        while True:
+            await self._wait_for_chat(message.chat_id)
+            await self.bucket.acquire()
+            started = time.perf_counter()
+            try:
+                await self._call(bot, message)
+                return None, (time.perf_counter() - started) * 1000.0
+            except RetryAfter as exc:
+                # Flood control is bot-wide: stall the whole bucket, then retry.
+                retry_after = exc.retry_after
+                seconds = retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else float(retry_after)
+                self.bucket.pause(seconds)
+                flood_waits += 1
+                if flood_waits > max(5, self.max_retries):
+                    return "RetryAfter", 0.0
+                continue
+            except Forbidden:
+                return "Forbidden", 0.0
+            except BadRequest as exc:
+                if "chat not found" in str(exc).lower():
+                    return "ChatNotFound", 0.0
+                return "BadRequest", 0.0
+            except (TimedOut, NetworkError) as exc:
+                attempt += 1
+                if attempt > self.max_retries:
+                    return type(exc).__name__, 0.0
+                await asyncio.sleep(min(30.0, 0.5 * (2**attempt)))
+            except Exception as exc:
+                return type(exc).__name__, 0.0
+
+    async def send_many(self, bot: Any, messages: Iterable[OutgoingMessage]) -> DispatchResult:
+        result = DispatchResult()
+        pending = iter(messages)
+
+        async def worker() -> None:
+            for message in pending:
+                error, latency_ms = await self.send(bot, message)
+                if error:
+                    result.record_failure(message, error)
+                else:
+                    result.record_success(message, latency_ms)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        return result
+
+
+dispatcher = Dispatcher(
+    rate_per_sec=settings.BOT_SEND_RATE_PER_SEC,
+    concurrency=settings.BOT_SEND_CONCURRENCY,
+    chat_min_interval=settings.BOT_CHAT_MIN_INTERVAL_SEC,
+    max_retries=settings.BOT_SEND_MAX_RETRIES,
+)
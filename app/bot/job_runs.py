@@ -0,0 +1,104 @@
+import asyncio
+import json
+import math
+import time
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.bot.dispatcher import DispatchResult
+from app.db import SessionLocal
+from app.db_writer import commit_write
+from app.models import JobRun
+
+
+def _percentile(values: List[float], q: float) -> Optional[int]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+    return int(ordered[idx])
+
+
+def _add_job_run(db: Session, run: JobRun) -> None:
+    db.add(run)
+
+
+class JobRunStats:
+    def __init__(self, job_name: str) -> None:
+        self.job_name = job_name
+        self.started_at = datetime.utcnow()
+        self.users_scanned = 0
+        self.messages_queued = 0
+        self.db_ms = 0.0
+        self.send_ms = 0.0
+        self.dispatch = DispatchResult()
+        self.details: Dict[str, Any] = {}
+        # Set by jobs that run often and should only be recorded when they did work.
+        self.skip = False
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def timing_db(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.db_ms += (time.perf_counter() - started) * 1000.0
+
+    @contextmanager
+    def timing_send(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.send_ms += (time.perf_counter() - started) * 1000.0
+
+    def add_dispatch(self, result: DispatchResult) -> None:
+        self.dispatch.sent += result.sent
+        self.dispatch.failed += result.failed
+        for error, count in result.errors.items():
+            self.dispatch.errors[error] = self.dispatch.errors.get(error, 0) + count
+        self.dispatch.latencies_ms.extend(result.latencies_ms)
+
+    def save(self, error: Optional[str] = None) -> None:
+        run = JobRun(
+            job_name=self.job_name,
+            status="error" if error else "ok",
+            error=error[:255] if error else None,
+            started_at=self.started_at,
+            finished_at=datetime.utcnow(),
+            duration_ms=int((time.perf_counter() - self._started) * 1000.0),
+            users_scanned=self.users_scanned,
+            messages_queued=self.messages_queued,
+            messages_sent=self.dispatch.sent,
+            messages_failed=self.dispatch.failed,
+            errors_json=json.dumps(self.dispatch.errors) if self.dispatch.errors else None,
+            details_json=json.dumps(self.details, default=str) if self.details else None,
+            db_ms=int(self.db_ms),
+            send_ms=int(self.send_ms),
+            send_p50_ms=_percentile(self.dispatch.latencies_ms, 0.50),
+            send_p95_ms=_percentile(self.dispatch.latencies_ms, 0.95),
+        )
+        try:
+            with SessionLocal() as db:
+                commit_write(db, _add_job_run, run)
+        except Exception as exc:
+            print(f"job run {self.job_name} not recorded: {type(exc).__name__}: {exc}")
+
+
+@asynccontextmanager
+async def track_job_run(job_name: str) -> AsyncIterator[JobRunStats]:
+    # The row is written on a worker thread so the job's event loop never
+    # waits on the insert.
+    stats = JobRunStats(job_name)
+    loop = asyncio.get_running_loop()
+    try:
+        yield stats
+    except Exception as exc:
+        await loop.run_in_executor(None, stats.save, f"{type(exc).__name__}: {exc}")
+        raise
+    if not stats.skip:
+        await loop.run_in_executor(None, stats.save)
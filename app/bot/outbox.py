@@ -0,0 +1,186 @@
+import json
+import uuid
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import Any, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from telegram import InlineKeyboardMarkup
+
+from app.bot.db_executor import run_write
+from app.bot.dispatcher import PERMANENT_ERRORS, UNDELIVERABLE_ERRORS, DispatchResult, OutgoingMessage, dispatcher
+from app.bot.shards import shard_criteria
+from app.config import settings
+from app.crud import mark_chats_undeliverable
+from app.models import OutboxMessage
+
+CLAIMABLE_STATUSES = ("pending", "sending")
+
+
+def _serialize(message: OutgoingMessage) -> str:
+    return json.dumps(
+        {
+            "text": message.text,
+            "parse_mode": message.parse_mode,
+            "reply_markup": message.reply_markup.to_dict() if message.reply_markup else None,
+        },
+        ensure_ascii=False,
+    )
+
+
+def _deserialize(outbox_id: int, chat_id: int, payload_json: str) -> OutgoingMessage:
+    data = json.loads(payload_json)
+    markup = data.get("reply_markup")
+    return OutgoingMessage(
+        chat_id=chat_id,
+        text=data.get("text") or "",
+        parse_mode=data.get("parse_mode"),
+        reply_markup=InlineKeyboardMarkup.de_json(markup, None) if markup else None,
+        outbox_id=outbox_id,
+    )
+
+
+def enqueue_messages(
+    db: Session, batch_key: str, messages: Iterable[OutgoingMessage], not_before: Optional[datetime] = None
+) -> int:
+    # One row per chat per batch; re-enqueueing the same batch is a no-op, so a
+    # job that crashed half-way can simply be re-run.
+    by_key = {f"{batch_key}:{m.chat_id}": m for m in messages}
+    if not by_key:
+        return 0
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "chat_id": message.chat_id,
+            "batch_key": batch_key,
+            "dedupe_key": key,
+            "payload_json": _serialize(message),
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": message.not_before or not_before or now,
+            "created_at": now,
+        }
+        for key, message in by_key.items()
+    ]
+    # The unique dedupe_key decides atomically, so overlapping enqueues of the
+    # same batch (catch-up tick, broadcast resume) skip rows instead of failing.
+    dialect_insert = postgresql_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    created = 0
+    for i in range(0, len(rows), 500):
+        created += db.execute(
+            dialect_insert(OutboxMessage).values(rows[i : i + 500]).on_conflict_do_nothing(index_elements=["dedupe_key"])
+        ).rowcount
+    db.commit()
+    return created
+
+
+def _claim_batch(db: Session, limit: int) -> Tuple[str, List[OutgoingMessage]]:
+    # Claimed rows get a lease in next_attempt_at; if the worker dies before
+    # recording the result, the row becomes claimable again once it expires.
+    now = datetime.utcnow()
+    token = uuid.uuid4().hex
+    # With several workers each one only drains chats in the shards it leases.
+    sharded = shard_criteria(OutboxMessage.chat_id)
+    ids = list(
+        db.scalars(
+            select(OutboxMessage.id)
+            .where(OutboxMessage.status.in_(CLAIMABLE_STATUSES), OutboxMessage.next_attempt_at <= now, *sharded)
+            .order_by(OutboxMessage.next_attempt_at, OutboxMessage.id)
+            .limit(limit)
+        )
+    )
+    if not ids:
+        return token, []
+    db.execute(
+        update(OutboxMessage)
+        .where(
+            OutboxMessage.id.in_(ids),
+            OutboxMessage.status.in_(CLAIMABLE_STATUSES),
+            OutboxMessage.next_attempt_at <= now,
+        )
+        .values(
+            status="sending",
+            claim_token=token,
+            next_attempt_at=now + timedelta(seconds=settings.OUTBOX_CLAIM_TTL_SEC),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    rows = db.execute(
+        select(OutboxMessage.id, OutboxMessage.chat_id, OutboxMessage.payload_json)
+        .where(OutboxMessage.claim_token == token)
+        .order_by(OutboxMessage.id)
+    ).all()
+    return token, [_deserialize(row_id, chat_id, payload_json) for row_id, chat_id, payload_json in rows]
+
+
+def _record_results(db: Session, token: str, result: DispatchResult) -> None:
+    # Only rows still held by this claim: if the lease expired mid-send and
+    # another drainer reclaimed a row, its state belongs to that drainer.
+    now = datetime.utcnow()
+    sent_ids = [m.outbox_id for m in result.delivered if m.outbox_id is not None]
+    for i in range(0, len(sent_ids), 500):
+        db.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(sent_ids[i : i + 500]), OutboxMessage.claim_token == token)
+            .values(status="sent", sent_at=now, claim_token=None, last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+
+    errors = {m.outbox_id: error for m, error in result.failures if m.outbox_id is not None}
+    if errors:
+        for row in db.scalars(
+            select(OutboxMessage).where(OutboxMessage.id.in_(list(errors)), OutboxMessage.claim_token == token)
+        ):
+            error = errors[row.id]
+            row.attempts = (row.attempts or 0) + 1
+            row.last_error = error[:64]
+            row.claim_token = None
+            if error in PERMANENT_ERRORS or row.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                row.status = "failed"
+            else:
+                row.status = "pending"
+                row.next_attempt_at = now + timedelta(seconds=min(3600, 30 * 2 ** (row.attempts - 1)))
+
+    dead_chats = [(m.chat_id, error) for m, error in result.failures if error in UNDELIVERABLE_ERRORS]
+    mark_chats_undeliverable(db, dead_chats)
+    db.commit()
+
+
+async def drain_outbox(bot: Any, batch_size: Optional[int] = None, run: Optional[Any] = None) -> DispatchResult:
+    # run: optional JobRunStats that gets DB vs Telegram time split per batch.
+    total = DispatchResult()
+    limit = batch_size or settings.OUTBOX_BATCH_SIZE
+    while True:
+        with run.timing_db() if run else nullcontext():
+            token, messages = await run_write(_claim_batch, limit)
+        if not messages:
+            return total
+        with run.timing_send() if run else nullcontext():
+            result = await dispatcher.send_many(bot, messages)
+        with run.timing_db() if run else nullcontext():
+            await run_write(_record_results, token, result)
+        if run:
+            run.add_dispatch(result)
+        total.merge(result)
+
+
+def prune_outbox(db: Session, before: datetime, limit: int = 5000) -> int:
+    # Deletes up to limit sent rows whose lease (set when claimed, so about
+    # the send time) ended before `before`; uses the status/next_attempt_at
+    # index. Their dedupe keys go with them.
+    ids = list(
+        db.scalars(
+            select(OutboxMessage.id)
+            .where(OutboxMessage.status == "sent", OutboxMessage.next_attempt_at < before)
+            .limit(limit)
+        )
+    )
+    if ids:
+        db.execute(delete(OutboxMessage).where(OutboxMessage.id.in_(ids)).execution_options(synchronize_session=False))
+    db.commit()
+    return len(ids)
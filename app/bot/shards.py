@@ -0,0 +1,146 @@
+import math
+from datetime import datetime, timedelta
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import delete, false, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+from app.db import SessionLocal
+from app.models import JobLease, JobWorker
+
+# None until this process starts leasing (API, scripts): then every shard is
+# treated as local, so nothing is filtered.
+_owned_shards: Optional[List[int]] = None
+
+
+def begin_leasing() -> None:
+    # A job worker holds no shards until its first heartbeat has claimed some.
+    global _owned_shards
+    if _owned_shards is None:
+        _owned_shards = []
+
+
+def owned_shards() -> Optional[List[int]]:
+    return _owned_shards
+
+
+def owns_global_jobs() -> bool:
+    # Backup, broadcast progress and the mentor ping run only on the shard-0 owner.
+    return _owned_shards is None or 0 in _owned_shards
+
+
+def shard_criteria(column: Any) -> list:
+    # Extra WHERE criteria limiting a tg-id column to the shards this worker holds.
+    if _owned_shards is None:
+        return []
+    if not _owned_shards:
+        return [false()]
+    if settings.JOB_SHARDS <= 1:
+        return []
+    return [(column % settings.JOB_SHARDS).in_(_owned_shards)]
+
+
+def _ensure_lease_rows(db: Any, shards: int) -> None:
+    existing = set(db.scalars(select(JobLease.shard).where(JobLease.shard < shards)))
+    missing = [{"shard": shard} for shard in range(shards) if shard not in existing]
+    if not missing:
+        return
+    try:
+        db.execute(insert(JobLease), missing)
+        db.commit()
+    except IntegrityError:
+        # Another worker created them first.
+        db.rollback()
+
+
+def _beat_worker(db: Any, worker_id: str, now: datetime) -> None:
+    updated = db.execute(
+        update(JobWorker)
+        .where(JobWorker.worker_id == worker_id)
+        .values(heartbeat_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if not updated.rowcount:
+        db.add(JobWorker(worker_id=worker_id, heartbeat_at=now, started_at=now))
+    # Forget workers that have been silent for a long time (old pids, dead hosts).
+    db.execute(
+        delete(JobWorker).where(JobWorker.heartbeat_at < now - timedelta(seconds=10 * settings.JOB_LEASE_TTL_SEC))
+    )
+    db.commit()
+
+
+def heartbeat_leases(worker_id: Optional[str] = None) -> Tuple[List[int], List[int]]:
+    # Renews this worker's leases, releases shards above its fair share and
+    # claims free or expired ones. Returns (owned, newly acquired). Commits on
+    # its own session rather than through the group-commit writer: a renewal
+    # must not wait behind a large job batch and let its leases expire.
+    global _owned_shards
+    worker_id = worker_id or settings.WORKER_ID
+    shards = settings.JOB_SHARDS
+    now = datetime.utcnow()
+    expired = now - timedelta(seconds=settings.JOB_LEASE_TTL_SEC)
+    previous = set(_owned_shards or [])
+
+    with SessionLocal() as db:
+        _beat_worker(db, worker_id, now)
+        _ensure_lease_rows(db, shards)
+        db.execute(
+            update(JobLease)
+            .where(JobLease.owner == worker_id, JobLease.shard < shards)
+            .values(heartbeat_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+        rows = db.execute(
+            select(JobLease.shard, JobLease.owner, JobLease.heartbeat_at).where(JobLease.shard < shards)
+        ).all()
+        live_workers = set(db.scalars(select(JobWorker.worker_id).where(JobWorker.heartbeat_at >= expired)))
+        live_workers.add(worker_id)
+        fair_share = math.ceil(shards / len(live_workers))
+
+        mine = sorted(shard for shard, owner, _ in rows if owner == worker_id)
+        for shard in mine[fair_share:]:
+            db.execute(
+                update(JobLease)
+                .where(JobLease.shard == shard, JobLease.owner == worker_id)
+                .values(owner=None, heartbeat_at=None)
+                .execution_options(synchronize_session=False)
+            )
+        mine = mine[:fair_share]
+
+        for shard, owner, beat in rows:
+            if len(mine) >= fair_share:
+                break
+            if owner == worker_id or (owner and beat and beat >= expired):
+                continue
+            claimed = db.execute(
+                update(JobLease)
+                .where(
+                    JobLease.shard == shard,
+                    or_(JobLease.owner.is_(None), JobLease.heartbeat_at.is_(None), JobLease.heartbeat_at < expired),
+                )
+                .values(owner=worker_id, heartbeat_at=now, acquired_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            if claimed.rowcount:
+                mine.append(shard)
+        db.commit()
+
+    _owned_shards = sorted(mine)
+    return _owned_shards, [shard for shard in _owned_shards if shard not in previous]
+
+
+def release_leases(worker_id: Optional[str] = None) -> None:
+    global _owned_shards
+    with SessionLocal() as db:
+        db.execute(
+            update(JobLease)
+            .where(JobLease.owner == (worker_id or settings.WORKER_ID))
+            .values(owner=None, heartbeat_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.execute(delete(JobWorker).where(JobWorker.worker_id == (worker_id or settings.WORKER_ID)))
+        db.commit()
+    _owned_shards = []
@@ -0,0 +1,75 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from app.config import settings
+from app.models import User
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    id: int
+    tg_user_id: int
+    username: Optional[str]
+    first_name: Optional[str]
+    payment_status: Optional[str]
+    rating_points: int
+    current_streak: int
+    selected_modules_json: Optional[str]
+
+
+def snapshot_user(user: User) -> CachedUser:
+    # Take it while the session is still open; later commits expire the ORM object.
+    return CachedUser(
+        id=user.id,
+        tg_user_id=user.tg_user_id,
+        username=user.username,
+        first_name=user.first_name,
+        payment_status=user.payment_status,
+        rating_points=user.rating_points or 0,
+        current_streak=user.current_streak or 0,
+        selected_modules_json=user.selected_modules_json,
+    )
+
+
+class UserCache:
+    # Recently seen users for menu callbacks, so a button tap with an unchanged
+    # Telegram profile skips the DB. Only touched from the event loop thread.
+    def __init__(self, ttl_sec: float = 60.0, max_size: int = 10000) -> None:
+        self.ttl_sec = ttl_sec
+        self.max_size = max_size
+        self._items: "OrderedDict[int, Tuple[float, CachedUser]]" = OrderedDict()
+
+    def get(self, tg_user_id: int, username: Optional[str] = None, first_name: Optional[str] = None) -> Optional[CachedUser]:
+        # A hit requires the profile fields to match; otherwise the caller
+        # should write them through upsert_user and put() the result.
+        item = self._items.get(tg_user_id)
+        if not item:
+            return None
+        expires_at, user = item
+        if expires_at < time.monotonic():
+            del self._items[tg_user_id]
+            return None
+        if user.username != username or user.first_name != first_name:
+            return None
+        self._items.move_to_end(tg_user_id)
+        return user
+
+    def put(self, cached: CachedUser) -> CachedUser:
+        if self.ttl_sec <= 0:
+            return cached
+        self._items[cached.tg_user_id] = (time.monotonic() + self.ttl_sec, cached)
+        self._items.move_to_end(cached.tg_user_id)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+        return cached
+
+    def invalidate(self, tg_user_id: int) -> None:
+        self._items.pop(tg_user_id, None)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+user_cache = UserCache(settings.BOT_USER_CACHE_TTL_SEC, settings.BOT_USER_CACHE_SIZE)
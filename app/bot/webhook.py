@@ -0,0 +1,87 @@
+import hmac
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, FastAPI, Header, HTTPException, Request
+from telegram import Update
+from telegram.ext import Application
+
+from app.config import settings
+
+
+def webhook_url() -> str:
+    return settings.BOT_WEBHOOK_URL.rstrip("/") + settings.BOT_WEBHOOK_PATH
+
+
+def create_webhook_router(application: Application, secret: Optional[str] = None) -> APIRouter:
+    # Telegram echoes secret_token from setWebhook in this header; anything
+    # without it is rejected before the body is parsed.
+    secret = (secret if secret is not None else settings.BOT_WEBHOOK_SECRET).strip()
+    if not secret:
+        raise RuntimeError("BOT_WEBHOOK_SECRET topilmadi")
+    router = APIRouter(tags=["telegram"])
+
+    @router.post(settings.BOT_WEBHOOK_PATH)
+    async def telegram_webhook(
+        request: Request,
+        x_telegram_bot_api_secret_token: Optional[str] = Header(default=None),
+    ) -> Dict[str, Any]:
+        if not hmac.compare_digest(x_telegram_bot_api_secret_token or "", secret):
+            raise HTTPException(status_code=403, detail="Secret token noto'g'ri")
+        try:
+            payload = await request.json()
+            update = Update.de_json(payload, application.bot)
+        except Exception as exc:
+            raise HTTPException(status_code=400, detail="Update JSON noto'g'ri") from exc
+        if update is None:
+            raise HTTPException(status_code=400, detail="Update JSON noto'g'ri")
+        # Answer Telegram right away; the application's update processor runs
+        # handlers with at most BOT_UPDATE_CONCURRENCY in flight.
+        await application.update_queue.put(update)
+        return {"ok": True}
+
+    return router
+
+
+async def start_webhook(application: Application, register: bool = True) -> None:
+    await application.initialize()
+    await application.start()
+    if register and settings.BOT_WEBHOOK_URL:
+        await application.bot.set_webhook(
+            url=webhook_url(),
+            secret_token=settings.BOT_WEBHOOK_SECRET,
+            max_connections=settings.BOT_WEBHOOK_MAX_CONNECTIONS,
+            allowed_updates=Update.ALL_TYPES,
+        )
+        print(f"Webhook: {webhook_url()} (concurrency={application.update_processor.max_concurrent_updates})")
+
+
+async def stop_webhook(application: Application) -> None:
+    if application.running:
+        await application.stop()
+    await application.shutdown()
+
+
+def attach_webhook(api: FastAPI, application: Application, register: bool = True) -> None:
+    # Mounts the webhook into an existing FastAPI app and ties the bot's
+    # lifecycle to the API's startup/shutdown.
+    api.include_router(create_webhook_router(application))
+
+    async def _startup() -> None:
+        await start_webhook(application, register)
+
+    async def _shutdown() -> None:
+        await stop_webhook(application)
+
+    api.add_event_handler("startup", _startup)
+    api.add_event_handler("shutdown", _shutdown)
+
+
+def build_webhook_api(application: Application, register: bool = True) -> FastAPI:
+    api = FastAPI(title="Intizomli bot webhook")
+    attach_webhook(api, application, register)
+
+    @api.get("/health/live")
+    def health_live() -> dict[str, str]:
+        return {"status": "alive"}
+
+    return api
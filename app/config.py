@@ -1,5 +1,7 @@
 import os
+import socket
 from pathlib import Path
+from typing import Optional
 
 from dotenv import load_dotenv
 
@@ -7,6 +9,12 @@ ROOT_DIR = Path(__file__).resolve().parents[1]
 load_dotenv(ROOT_DIR / ".env")
 
 
+def _env_int(name: str) -> Optional[int]:
+    # Blank or unset means "use the profile default".
+    raw = os.getenv(name, "").strip()
+    return int(raw) if raw else None
+
+
 class Settings:
     BOT_TOKEN: str = os.getenv("BOT_TOKEN", "")
     MINIAPP_URL: str = os.getenv("MINIAPP_URL", "https://intizomli-miniapp.vercel.app")
@@ -19,7 +27,55 @@ class Settings:
     RETENTION_DAYS: str = os.getenv("RETENTION_DAYS", "2,3,5")
     PAYMENT_MODE: str = os.getenv("PAYMENT_MODE", "manual_code").strip().lower()
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./intizomli.db")
+    DATABASE_REPLICA_URL: str = os.getenv("DATABASE_REPLICA_URL", "")
+    DB_REPLICA_STICKY_SEC: float = float(os.getenv("DB_REPLICA_STICKY_SEC", "10"))
+    DB_POOL_PROFILE: str = os.getenv("DB_POOL_PROFILE", "api").strip().lower()
+    DB_POOL_SIZE: Optional[int] = _env_int("DB_POOL_SIZE")
+    DB_MAX_OVERFLOW: Optional[int] = _env_int("DB_MAX_OVERFLOW")
+    DB_POOL_TIMEOUT_SEC: Optional[int] = _env_int("DB_POOL_TIMEOUT_SEC")
+    DB_POOL_RECYCLE_SEC: Optional[int] = _env_int("DB_POOL_RECYCLE_SEC")
+    DB_PRE_PING: str = os.getenv("DB_PRE_PING", "").strip().lower()
+    DB_PRE_PING_IDLE_SEC: int = int(os.getenv("DB_PRE_PING_IDLE_SEC", "60"))
+    DB_STATEMENT_TIMEOUT_MS: Optional[int] = _env_int("DB_STATEMENT_TIMEOUT_MS")
+    DB_POOL_WAIT_LOG_MS: int = int(os.getenv("DB_POOL_WAIT_LOG_MS", "200"))
+    SQLITE_PRAGMA_PROFILE: str = os.getenv("SQLITE_PRAGMA_PROFILE", "wal").strip().lower()
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "").strip().upper()
+    SQLITE_BUSY_TIMEOUT_MS: Optional[int] = _env_int("SQLITE_BUSY_TIMEOUT_MS")
+    SQLITE_CACHE_SIZE_KB: Optional[int] = _env_int("SQLITE_CACHE_SIZE_KB")
+    SQLITE_MMAP_SIZE_MB: Optional[int] = _env_int("SQLITE_MMAP_SIZE_MB")
+    DB_WRITER_ENABLED: bool = os.getenv("DB_WRITER_ENABLED", "0") == "1"
+    DB_WRITER_MAX_BATCH: int = int(os.getenv("DB_WRITER_MAX_BATCH", "64"))
+    DB_WRITER_MAX_WAIT_MS: float = float(os.getenv("DB_WRITER_MAX_WAIT_MS", "2"))
     AUTO_CREATE_SCHEMA: bool = os.getenv("AUTO_CREATE_SCHEMA", "0") == "1"
+    BOT_TIMEZONE: str = os.getenv("BOT_TIMEZONE", "Asia/Tashkent")
+    BOT_SEND_RATE_PER_SEC: float = float(os.getenv("BOT_SEND_RATE_PER_SEC", "28"))
+    BOT_SEND_CONCURRENCY: int = int(os.getenv("BOT_SEND_CONCURRENCY", "16"))
+    BOT_CHAT_MIN_INTERVAL_SEC: float = float(os.getenv("BOT_CHAT_MIN_INTERVAL_SEC", "1.0"))
+    BOT_SEND_MAX_RETRIES: int = int(os.getenv("BOT_SEND_MAX_RETRIES", "3"))
+    OUTBOX_DRAIN_INTERVAL_SEC: int = int(os.getenv("OUTBOX_DRAIN_INTERVAL_SEC", "15"))
+    BROADCAST_PROGRESS_INTERVAL_SEC: int = int(os.getenv("BROADCAST_PROGRESS_INTERVAL_SEC", "10"))
+    REMINDER_SPREAD_MINUTES: int = max(0, int(os.getenv("REMINDER_SPREAD_MINUTES", "20")))
+    USER_CHUNK_SIZE: int = int(os.getenv("USER_CHUNK_SIZE", "500"))
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "500"))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+    OUTBOX_CLAIM_TTL_SEC: int = int(os.getenv("OUTBOX_CLAIM_TTL_SEC", "300"))
+    OUTBOX_RETENTION_DAYS: int = max(1, int(os.getenv("OUTBOX_RETENTION_DAYS", "14")))
+    JOB_SHARDS: int = max(1, int(os.getenv("JOB_SHARDS", "1")))
+    JOB_LEASE_TTL_SEC: int = int(os.getenv("JOB_LEASE_TTL_SEC", "60"))
+    BOT_DB_WORKERS: int = max(1, int(os.getenv("BOT_DB_WORKERS", "4")))
+    BOT_USER_CACHE_TTL_SEC: float = float(os.getenv("BOT_USER_CACHE_TTL_SEC", "60"))
+    BOT_USER_CACHE_SIZE: int = int(os.getenv("BOT_USER_CACHE_SIZE", "10000"))
+    BOT_UPDATE_CONCURRENCY: int = max(1, int(os.getenv("BOT_UPDATE_CONCURRENCY", "32")))
+    BOT_ROLE: str = os.getenv("BOT_ROLE", "all")
+    BOT_MODE: str = os.getenv("BOT_MODE", "polling")
+    WEBHOOK_LISTEN: str = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+    WEBHOOK_PORT: int = int(os.getenv("WEBHOOK_PORT", "8443"))
+    BOT_WEBHOOK_URL: str = os.getenv("BOT_WEBHOOK_URL", "").strip()
+    BOT_WEBHOOK_PATH: str = "/" + os.getenv("BOT_WEBHOOK_PATH", "/telegram/webhook").strip().lstrip("/")
+    BOT_WEBHOOK_SECRET: str = os.getenv("BOT_WEBHOOK_SECRET", "").strip()
+    BOT_WEBHOOK_MAX_CONNECTIONS: int = int(os.getenv("BOT_WEBHOOK_MAX_CONNECTIONS", "40"))
+    BOT_WEBHOOK_IN_API: bool = os.getenv("BOT_WEBHOOK_IN_API", "0") == "1"
+    WORKER_ID: str = (os.getenv("WORKER_ID", "").strip() or f"{socket.gethostname()}-{os.getpid()}")[:64]
     CORS_ORIGINS: list[str] = [
         item.strip()
         for item in os.getenv("CORS_ORIGINS", "*").split(",")
@@ -1,8 +1,50 @@
+from app.crud.broadcasts import count_segment, create_broadcast, get_active_broadcasts, get_segment_snapshots, parse_segment
+from app.crud.day_close import (
+    close_day,
+    count_missed_users,
+    count_submitted_users,
+    day_participant_clause,
+    get_missed_users,
+    get_submitted_users,
+    record_submission,
+)
 from app.crud.habits import get_active_habits, seed_habits_if_empty
 from app.crud.onboarding import replace_onboarding_answers
+from app.crud.plans import (
+    WEEKDAY_KEYS,
+    build_daily_plan,
+    get_daily_plan,
+    get_plan_summaries,
+    invalidate_daily_plan,
+    materialize_daily_plans,
+    normalize_days,
+)
 from app.crud.referrals import create_referral, get_referral_count
-from app.crud.reports import get_completion_percent, get_habits_state_for_date, get_streak_days, save_daily_habit_report
-from app.crud.user import complete_user_onboarding, get_reportable_users, get_user_by_tg_id, mark_user_paid, upsert_user
+from app.crud.reminders import (
+    get_due_reminders,
+    parse_reminder_hours,
+    reminder_buckets,
+    sync_reminder_slots,
+    valid_timezone,
+)
+from app.crud.reports import (
+    get_completion_percent,
+    get_habits_state_for_date,
+    get_report_stats_by_user,
+    get_streak_days,
+    save_daily_habit_report,
+)
+from app.crud.user import (
+    complete_user_onboarding,
+    get_reportable_users,
+    get_user_by_tg_id,
+    get_user_snapshots,
+    mark_chats_undeliverable,
+    mark_user_paid,
+    mark_user_reachable,
+    reportable_user_clause,
+    upsert_user,
+)
 
 __all__ = [
     "upsert_user",
@@ -10,12 +52,41 @@ __all__ = [
     "mark_user_paid",
     "complete_user_onboarding",
     "get_reportable_users",
+    "reportable_user_clause",
+    "get_user_snapshots",
+    "mark_chats_undeliverable",
+    "mark_user_reachable",
+    "get_due_reminders",
+    "parse_reminder_hours",
+    "reminder_buckets",
+    "sync_reminder_slots",
+    "valid_timezone",
+    "parse_segment",
+    "count_segment",
+    "create_broadcast",
+    "get_active_broadcasts",
+    "get_segment_snapshots",
+    "WEEKDAY_KEYS",
+    "build_daily_plan",
+    "get_daily_plan",
+    "get_missed_users",
+    "get_plan_summaries",
+    "invalidate_daily_plan",
+    "materialize_daily_plans",
+    "normalize_days",
+    "close_day",
+    "count_missed_users",
+    "count_submitted_users",
+    "day_participant_clause",
+    "get_submitted_users",
+    "record_submission",
     "seed_habits_if_empty",
     "get_active_habits",
     "save_daily_habit_report",
     "get_habits_state_for_date",
     "get_streak_days",
     "get_completion_percent",
+    "get_report_stats_by_user",
     "create_referral",
     "get_referral_count",
     "replace_onboarding_answers",
@@ -0,0 +1,89 @@
+import json
+from datetime import date, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import Row, and_, exists, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.crud.user import get_user_snapshots
+from app.models import Broadcast, DailyModuleReport, User
+
+BROADCAST_MODULES = {"habits", "sports", "reading"}
+ACTIVE_BROADCAST_STATUSES = ("queued", "enqueuing", "sending")
+
+
+def parse_segment(raw: Optional[dict[str, Any]], today: Optional[date] = None) -> dict[str, Any]:
+    # Normalised filters; as_of pins "missed N days" to the day the broadcast
+    # was created so a resumed broadcast resolves the same audience.
+    raw = raw or {}
+    module = str(raw.get("module") or "").strip().lower() or None
+    if module and module not in BROADCAST_MODULES:
+        raise ValueError(f"module: {', '.join(sorted(BROADCAST_MODULES))}")
+    try:
+        missed_days = max(0, min(int(raw.get("missed_days") or 0), 60))
+    except (TypeError, ValueError) as exc:
+        raise ValueError("missed_days raqam bo'lishi kerak") from exc
+    paid = raw.get("paid", True)
+    if isinstance(paid, str):
+        paid = paid.strip().lower() not in {"0", "false", "no", "yoq"}
+    as_of = raw.get("as_of") or (today or date.today()).isoformat()
+    return {"module": module, "paid": bool(paid), "missed_days": missed_days, "as_of": as_of}
+
+
+def segment_clause(segment: dict[str, Any]):
+    clauses = [User.blocked_at.is_(None)]
+    if segment.get("paid"):
+        clauses.append(or_(User.is_paid.is_(True), User.payment_status == "paid"))
+    if segment.get("module"):
+        clauses.append(User.selected_modules_json.like(f'%"{segment["module"]}"%'))
+    missed_days = int(segment.get("missed_days") or 0)
+    if missed_days:
+        # No report at all in the N full days before as_of (uses the
+        # report_date/user_id index); users who started later are not "missing".
+        as_of = date.fromisoformat(segment["as_of"])
+        since = as_of - timedelta(days=missed_days)
+        clauses.append(
+            ~exists().where(
+                DailyModuleReport.report_date >= since,
+                DailyModuleReport.report_date < as_of,
+                DailyModuleReport.user_id == User.id,
+            )
+        )
+        clauses.append(or_(User.marathon_start_date.is_(None), User.marathon_start_date <= since))
+    return and_(*clauses)
+
+
+def count_segment(db: Session, segment: dict[str, Any]) -> int:
+    return int(db.scalar(select(func.count()).select_from(User).where(segment_clause(segment))) or 0)
+
+
+def get_segment_snapshots(db: Session, segment: dict[str, Any], after_id: int, limit: int) -> list[Row]:
+    return get_user_snapshots(db, after_id, limit, segment_clause(segment))
+
+
+def create_broadcast(
+    db: Session,
+    text: str,
+    segment: dict[str, Any],
+    created_by_tg_user_id: Optional[int] = None,
+    progress_chat_id: Optional[int] = None,
+    status: str = "enqueuing",
+) -> Broadcast:
+    broadcast = Broadcast(
+        created_by_tg_user_id=created_by_tg_user_id,
+        segment_json=json.dumps(segment, ensure_ascii=False),
+        text=text,
+        status=status,
+        progress_chat_id=progress_chat_id,
+    )
+    db.add(broadcast)
+    db.commit()
+    db.refresh(broadcast)
+    return broadcast
+
+
+def get_active_broadcasts(db: Session) -> list[Broadcast]:
+    return list(
+        db.scalars(select(Broadcast).where(Broadcast.status.in_(ACTIVE_BROADCAST_STATUSES)).order_by(Broadcast.id))
+    )
+
@@ -0,0 +1,120 @@
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import Integer, and_, exists, func, insert, literal, or_, select, true, update
+from sqlalchemy.orm import Session
+
+from app.models import DailyModuleReport, DailySubmission, User
+
+
+def day_participant_clause(day: date):
+    # Same rule as _is_active in the API, evaluated for a given day.
+    return and_(
+        User.registration_completed.is_(True),
+        User.selected_modules_json.is_not(None),
+        User.payment_status == "paid",
+        User.marathon_start_date.is_not(None),
+        User.marathon_start_date <= day,
+    )
+
+
+def _not_closed(day: date):
+    return ~exists().where(DailySubmission.report_date == day, DailySubmission.user_id == User.id)
+
+
+def close_day(db: Session, day: date) -> dict[str, int]:
+    # Set-based and idempotent: every processed user gets a ledger row for the
+    # day in the same transaction, and users that already have one are skipped.
+    submitted = db.execute(
+        insert(DailySubmission).from_select(
+            ["report_date", "user_id", "submitted", "done", "total"],
+            select(
+                literal(day),
+                DailyModuleReport.user_id,
+                true(),
+                func.coalesce(func.sum(func.cast(DailyModuleReport.is_done, Integer)), 0),
+                func.count(),
+            )
+            .where(
+                DailyModuleReport.report_date == day,
+                ~exists().where(
+                    DailySubmission.report_date == day,
+                    DailySubmission.user_id == DailyModuleReport.user_id,
+                ),
+            )
+            .group_by(DailyModuleReport.user_id),
+        )
+    ).rowcount
+
+    missed = and_(day_participant_clause(day), _not_closed(day))
+    # No streak to protect, or the one-time freeze is already spent: reset.
+    reset = db.execute(
+        update(User)
+        .where(missed, (User.current_streak <= 0) | User.streak_freeze_used.is_(True))
+        .values(current_streak=0, missed_days_count=func.coalesce(User.missed_days_count, 0) + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    # Running streak and an unused freeze: the freeze absorbs the missed day.
+    frozen = db.execute(
+        update(User)
+        .where(missed, User.current_streak > 0, User.streak_freeze_used.is_not(True))
+        .values(streak_freeze_used=True, missed_days_count=func.coalesce(User.missed_days_count, 0) + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.execute(
+        insert(DailySubmission).from_select(
+            ["report_date", "user_id", "submitted", "done", "total"],
+            select(literal(day), User.id, literal(False), literal(0), literal(0)).where(missed),
+        )
+    )
+    db.commit()
+    return {"submitted": submitted, "missed": reset + frozen, "streak_reset": reset, "freeze_used": frozen}
+
+
+def record_submission(db: Session, user_id: int, day: date, done: int, total: int, score: int) -> None:
+    # Caller commits; a resubmission for the same day overwrites the row.
+    row = db.scalar(select(DailySubmission).where(DailySubmission.report_date == day, DailySubmission.user_id == user_id))
+    if row is None:
+        row = DailySubmission(report_date=day, user_id=user_id)
+    row.submitted = True
+    row.done = done
+    row.total = total
+    row.score = score
+    db.add(row)
+
+
+def _submitted_clause(day: date):
+    return exists().where(
+        DailySubmission.report_date == day,
+        DailySubmission.user_id == User.id,
+        DailySubmission.submitted.is_(True),
+    )
+
+
+def _missed_clause(day: date):
+    # Closed days carry explicit submitted=False rows; for a day that is still
+    # open, participants without any ledger row have not reported yet.
+    return or_(
+        exists().where(
+            DailySubmission.report_date == day,
+            DailySubmission.user_id == User.id,
+            DailySubmission.submitted.is_(False),
+        ),
+        and_(day_participant_clause(day), _not_closed(day)),
+    )
+
+
+def get_submitted_users(db: Session, day: date, limit: Optional[int] = None) -> list[User]:
+    return list(db.scalars(select(User).where(_submitted_clause(day)).order_by(User.id).limit(limit)))
+
+
+def get_missed_users(db: Session, day: date, limit: Optional[int] = None) -> list[User]:
+    return list(db.scalars(select(User).where(_missed_clause(day)).order_by(User.id).limit(limit)))
+
+
+def count_submitted_users(db: Session, day: date) -> int:
+    return db.scalar(select(func.count()).select_from(User).where(_submitted_clause(day))) or 0
+
+
+def count_missed_users(db: Session, day: date) -> int:
+    return db.scalar(select(func.count()).select_from(User).where(_missed_clause(day))) or 0
@@ -0,0 +1,172 @@
+import json
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.crud.day_close import day_participant_clause
+from app.db_writer import commit_write
+from app.models import Challenge, DailyPlan, User
+
+WEEKDAY_KEYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+def normalize_days(raw_days: Any) -> List[str]:
+    if not isinstance(raw_days, list):
+        return ["daily"]
+    days: List[str] = []
+    for item in raw_days:
+        val = str(item).strip().lower()
+        if val == "daily":
+            return ["daily"]
+        if val in WEEKDAY_KEYS and val not in days:
+            days.append(val)
+    return days or ["daily"]
+
+
+def _json_value(value: Optional[str], default: Any) -> Any:
+    if not value:
+        return default
+    try:
+        return json.loads(value)
+    except Exception:
+        return default
+
+
+def _scheduled_items(raw: Any, day_key: str, with_target: bool = False) -> List[str]:
+    if raw and isinstance(raw[0], str):
+        return [str(x) for x in raw]
+    items: List[str] = []
+    for item in raw:
+        name = str((item or {}).get("name", "")).strip()
+        days = normalize_days((item or {}).get("days", ["daily"]))
+        if not name or ("daily" not in days and day_key not in days):
+            continue
+        target = (item or {}).get("target_count") if with_target else None
+        if isinstance(target, int) and target > 0:
+            items.append(f"{name} ({target} marta)")
+        else:
+            items.append(name)
+    return items
+
+
+def build_daily_plan(user: User, day: date, challenge: Optional[Challenge] = None) -> Dict[str, List[str]]:
+    raw_modules = _json_value(user.selected_modules_json, [])
+    modules = [str(x) for x in raw_modules] if isinstance(raw_modules, list) else []
+    day_key = WEEKDAY_KEYS[day.weekday()]
+    result: Dict[str, List[str]] = {}
+
+    if "habits" in modules:
+        result["habits"] = _scheduled_items(_json_value(user.habits_json, []), day_key)
+    if "sports" in modules:
+        result["sports"] = _scheduled_items(_json_value(user.sports_json, []), day_key, with_target=True)
+    if "reading" in modules:
+        result["reading"] = [f"{user.reading_book or 'Intizom kuchi'} — {user.reading_task or '30 bet'}"]
+
+    marathon_day = (day - user.marathon_start_date).days + 1 if user.marathon_start_date else 0
+    if "challenge" in modules and marathon_day >= 5 and challenge:
+        if challenge.start_date <= day <= challenge.end_date:
+            result["challenge"] = _json_value(challenge.tasks_json, [])
+
+    return {k: v for k, v in result.items() if v}
+
+
+def _active_challenges(db: Session, user_ids: List[int]) -> Dict[int, Challenge]:
+    latest: Dict[int, Challenge] = {}
+    if not user_ids:
+        return latest
+    for challenge in db.scalars(
+        select(Challenge)
+        .where(Challenge.user_id.in_(user_ids), Challenge.status == "active")
+        .order_by(Challenge.id)
+    ):
+        latest[challenge.user_id] = challenge
+    return latest
+
+
+def _plan_row(user_id: int, day: date, plan: Dict[str, List[str]]) -> Dict[str, Any]:
+    return {
+        "plan_date": day,
+        "user_id": user_id,
+        "plan_json": json.dumps(plan, ensure_ascii=False),
+        "modules": ",".join(plan)[:64],
+        "total_items": sum(len(items) for items in plan.values()),
+    }
+
+
+def get_daily_plan(db: Session, user: User, day: Optional[date] = None) -> Dict[str, List[str]]:
+    # Reads the day's snapshot; builds and stores it on first access.
+    day = day or date.today()
+    plan_json = db.scalar(select(DailyPlan.plan_json).where(DailyPlan.user_id == user.id, DailyPlan.plan_date == day))
+    if plan_json is not None:
+        return _json_value(plan_json, {})
+
+    plan = build_daily_plan(user, day, _active_challenges(db, [user.id]).get(user.id))
+    commit_write(db, _store_daily_plan, user.id, day, plan)
+    return plan
+
+
+def _store_daily_plan(db: Session, user_id: int, day: date, plan: Dict[str, List[str]]) -> None:
+    # A snapshot built concurrently by another request or the batch job wins;
+    # skipping the row keeps the caller's transaction intact.
+    dialect_insert = postgresql_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    db.execute(
+        dialect_insert(DailyPlan)
+        .values(_plan_row(user_id, day, plan))
+        .on_conflict_do_nothing(index_elements=["plan_date", "user_id"])
+    )
+
+
+def invalidate_daily_plan(db: Session, user_id: int, day: Optional[date] = None) -> None:
+    # Caller commits; today's and any future snapshots are rebuilt on next read.
+    db.execute(delete(DailyPlan).where(DailyPlan.user_id == user_id, DailyPlan.plan_date >= (day or date.today())))
+
+
+def materialize_daily_plans(db: Session, day: date, after_id: int = 0, limit: int = 500, *criteria) -> tuple[int, int]:
+    # One chunk of participants (keyset on users.id); returns (last id, created).
+    users = list(
+        db.scalars(
+            select(User)
+            .where(User.id > after_id, day_participant_clause(day), *criteria)
+            .order_by(User.id)
+            .limit(limit)
+        )
+    )
+    if not users:
+        return after_id, 0
+
+    user_ids = [u.id for u in users]
+    existing = set(db.scalars(select(DailyPlan.user_id).where(DailyPlan.plan_date == day, DailyPlan.user_id.in_(user_ids))))
+    challenges = _active_challenges(db, user_ids)
+    rows = [
+        _plan_row(u.id, day, build_daily_plan(u, day, challenges.get(u.id)))
+        for u in users
+        if u.id not in existing
+    ]
+    if rows:
+        try:
+            db.execute(insert(DailyPlan), rows)
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            rows = []
+    return users[-1].id, len(rows)
+
+
+def get_plan_summaries(db: Session, user_ids: List[int], day: date) -> Dict[int, tuple[List[str], int]]:
+    # {user_id: (modules, total items)} for the day, without parsing plan_json.
+    if not user_ids:
+        return {}
+    return {
+        user_id: ([m for m in (modules or "").split(",") if m], int(total or 0))
+        for user_id, modules, total in db.execute(
+            select(DailyPlan.user_id, DailyPlan.modules, DailyPlan.total_items).where(
+                DailyPlan.plan_date == day, DailyPlan.user_id.in_(user_ids)
+            )
+        )
+    }
+
@@ -0,0 +1,88 @@
+from datetime import datetime
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import Row, and_, delete, or_, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.crud.user import USER_SNAPSHOT_COLUMNS, reportable_user_clause
+from app.models import ReminderSlot, User
+
+DEFAULT_REMINDER_HOURS = [9, 14, 21]
+SLOT_NAMES = ["morning", "midday", "night"]
+
+
+def parse_reminder_hours(raw: Optional[str]) -> list[int]:
+    hours: list[int] = []
+    for part in (raw or "").split(","):
+        part = part.strip()
+        if not part.isdigit():
+            continue
+        hour = int(part)
+        if 0 <= hour <= 23 and hour not in hours:
+            hours.append(hour)
+    if len(hours) != 3:
+        return list(DEFAULT_REMINDER_HOURS)
+    return sorted(hours)
+
+
+def valid_timezone(name: Optional[str]) -> Optional[str]:
+    name = (name or "").strip()
+    if not name:
+        return None
+    try:
+        ZoneInfo(name)
+    except Exception:
+        return None
+    return name
+
+
+def user_timezone(user: User) -> str:
+    return valid_timezone(user.timezone) or settings.BOT_TIMEZONE
+
+
+def sync_reminder_slots(db: Session, user: User) -> None:
+    # Caller commits; keeps the hour-bucket rows in step with reminder_hours_json.
+    db.execute(delete(ReminderSlot).where(ReminderSlot.user_id == user.id))
+    if not user.reminder_hours_json:
+        return
+    tz_name = user_timezone(user)
+    for idx, hour in enumerate(parse_reminder_hours(user.reminder_hours_json)):
+        db.add(ReminderSlot(user_id=user.id, timezone=tz_name, local_hour=hour, slot=SLOT_NAMES[idx]))
+
+
+def reminder_buckets(db: Session, now: datetime) -> list[tuple[str, int]]:
+    # (timezone, local hour) for every timezone that has slots; computed once
+    # per tick and reused for every page.
+    buckets = []
+    for tz_name in db.scalars(select(ReminderSlot.timezone).distinct()):
+        try:
+            local_hour = now.astimezone(ZoneInfo(tz_name)).hour
+        except Exception:
+            continue
+        buckets.append((tz_name, local_hour))
+    return buckets
+
+
+def get_due_reminders(
+    db: Session, buckets: list[tuple[str, int]], after_id: int = 0, limit: int = 500, *criteria
+) -> list[Row]:
+    # Snapshot rows (USER_SNAPSHOT_COLUMNS + slot) for users whose own
+    # reminder hour is the bucket's local hour; paged by users.id.
+    if not buckets:
+        return []
+    due = [
+        and_(ReminderSlot.timezone == tz_name, ReminderSlot.local_hour == local_hour)
+        for tz_name, local_hour in buckets
+    ]
+
+    return list(
+        db.execute(
+            select(*USER_SNAPSHOT_COLUMNS, ReminderSlot.slot)
+            .join(ReminderSlot, ReminderSlot.user_id == User.id)
+            .where(User.id > after_id, or_(*due), reportable_user_clause(), *criteria)
+            .order_by(User.id)
+            .limit(limit)
+        ).all()
+    )
@@ -1,9 +1,10 @@
 from datetime import date
+from typing import Optional
 
-from sqlalchemy import and_, delete, func, select
+from sqlalchemy import Integer, and_, delete, func, select
 from sqlalchemy.orm import Session
 
-from app.models import HabitReport, User
+from app.models import DailyModuleReport, HabitReport, User
 from app.crud.habits import get_active_habits
 
 
@@ -74,3 +75,30 @@ def get_completion_percent(db: Session, user: User, report_date: date) -> int:
         )
     ) or 0
     return int((done * 100) / total)
+
+
+def get_report_stats_by_user(
+    db: Session,
+    start_date: date,
+    end_date: Optional[date] = None,
+    user_ids: Optional[list[int]] = None,
+) -> dict[int, tuple[int, int]]:
+    end_date = end_date or start_date
+    query = (
+        select(
+            DailyModuleReport.user_id,
+            func.sum(func.cast(DailyModuleReport.is_done, Integer)).label("done"),
+            func.count().label("total"),
+        )
+        .where(
+            and_(
+                DailyModuleReport.report_date >= start_date,
+                DailyModuleReport.report_date <= end_date,
+            )
+        )
+        .group_by(DailyModuleReport.user_id)
+    )
+    if user_ids is not None:
+        query = query.where(DailyModuleReport.user_id.in_(user_ids))
+    rows = db.execute(query).all()
+    return {user_id: (int(done or 0), int(total or 0)) for user_id, done, total in rows}
@@ -1,27 +1,42 @@
-from datetime import date
+from datetime import date, datetime
 from typing import Optional
 
-from sqlalchemy import and_, or_, select
+from sqlalchemy import Row, and_, or_, select, update
 from sqlalchemy.orm import Session
 
+from app.db_writer import commit_write
 from app.models import User
 
+# Plain columns the bot jobs need; loaded as row snapshots, not ORM objects.
+USER_SNAPSHOT_COLUMNS = (
+    User.id,
+    User.tg_user_id,
+    User.username,
+    User.first_name,
+    User.full_name,
+    User.selected_modules_json,
+    User.current_streak,
+    User.last_report_date,
+)
+
+
+def _save_user_profile(db: Session, tg_user_id: int, username: Optional[str], first_name: Optional[str]) -> None:
+    user = db.scalar(select(User).where(User.tg_user_id == tg_user_id))
+    if user is None:
+        db.add(User(tg_user_id=tg_user_id, username=username, first_name=first_name))
+        return
+    user.username = username
+    user.first_name = first_name
+    db.add(user)
+
 
 def upsert_user(db: Session, tg_user_id: int, username: Optional[str], first_name: Optional[str]) -> User:
     user = db.scalar(select(User).where(User.tg_user_id == tg_user_id))
-    if user:
-        user.username = username
-        user.first_name = first_name
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+    # Nothing changed on the Telegram side: no UPDATE, no commit.
+    if user and user.username == username and user.first_name == first_name:
         return user
-
-    user = User(tg_user_id=tg_user_id, username=username, first_name=first_name)
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
+    commit_write(db, _save_user_profile, tg_user_id, username, first_name)
+    return db.scalar(select(User).where(User.tg_user_id == tg_user_id))
 
 
 def get_user_by_tg_id(db: Session, tg_user_id: int) -> Optional[User]:
@@ -58,18 +73,57 @@ def complete_user_onboarding(db: Session, tg_user_id: int) -> Optional[User]:
     return user
 
 
+def reportable_user_clause():
+    return and_(
+        User.blocked_at.is_(None),
+        or_(User.is_paid.is_(True), User.payment_status == "paid"),
+        or_(
+            User.onboarding_completed.is_(True),
+            and_(
+                User.registration_completed.is_(True),
+                User.selected_modules_json.is_not(None),
+            ),
+        ),
+    )
+
+
 def get_reportable_users(db: Session) -> list[User]:
+    return list(db.scalars(select(User).where(reportable_user_clause())))
+
+
+def get_user_snapshots(db: Session, after_id: int, limit: int, *criteria) -> list[Row]:
     return list(
-        db.scalars(
-            select(User).where(
-                or_(User.is_paid.is_(True), User.payment_status == "paid"),
-                or_(
-                    User.onboarding_completed.is_(True),
-                    and_(
-                        User.registration_completed.is_(True),
-                        User.selected_modules_json.is_not(None),
-                    ),
-                ),
-            )
-        )
+        db.execute(
+            select(*USER_SNAPSHOT_COLUMNS)
+            .where(User.id > after_id, *criteria)
+            .order_by(User.id)
+            .limit(limit)
+        ).all()
     )
+
+
+def mark_chats_undeliverable(db: Session, failures: list[tuple[int, str]]) -> None:
+    # Caller commits. failures: (tg chat id, error class) from the dispatcher.
+    by_error: dict[str, list[int]] = {}
+    for chat_id, error in failures:
+        by_error.setdefault(error, []).append(chat_id)
+    now = datetime.utcnow()
+    for error, chat_ids in by_error.items():
+        for i in range(0, len(chat_ids), 500):
+            db.execute(
+                update(User)
+                .where(User.tg_user_id.in_(chat_ids[i : i + 500]), User.blocked_at.is_(None))
+                .values(blocked_at=now, blocked_reason=error[:64])
+                .execution_options(synchronize_session=False)
+            )
+
+
+def mark_user_reachable(db: Session, user: User) -> User:
+    if user.blocked_at is None:
+        return user
+    user.blocked_at = None
+    user.blocked_reason = None
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
@@ -1,8 +1,55 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import time
+from typing import Any, Dict, Optional, Union
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from app.config import settings
 
+# Per-process defaults; each DB_* setting overrides its profile value. The bot
+# holds few long jobs, the API many short requests with a tight timeout.
+# pool_size/max_overflow are the process budget per database server; when the
+# async engine is on, it and the sync engine split that budget.
+POOL_PROFILES: Dict[str, Dict[str, Any]] = {
+    "api": {
+        "pool_size": 5,
+        "max_overflow": 5,
+        "pool_timeout": 10,
+        "pool_recycle": 1800,
+        "pre_ping": "idle",
+        "statement_timeout_ms": 5000,
+        "async_engine": True,
+    },
+    "bot": {
+        "pool_size": 3,
+        "max_overflow": 2,
+        "pool_timeout": 30,
+        "pool_recycle": 1800,
+        "pre_ping": "idle",
+        "statement_timeout_ms": 60000,
+        "async_engine": False,
+    },
+}
+PRE_PING_STRATEGIES = ("always", "idle", "off")
+
+# Applied on every new SQLite connection. "wal" lets the bot and the API read
+# while the other writes; "off" keeps SQLite's own defaults.
+SQLITE_PRAGMA_PROFILES: Dict[str, Dict[str, Any]] = {
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "cache_size": -32000,
+        "mmap_size": 128 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+    "off": {},
+}
+SQLITE_SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
 
 def _normalize_database_url(raw_url: str) -> str:
     url = (raw_url or "").strip()
@@ -13,8 +60,235 @@ def _normalize_database_url(raw_url: str) -> str:
     return url
 
 
+def pool_profile() -> Dict[str, Any]:
+    if settings.DB_POOL_PROFILE not in POOL_PROFILES:
+        raise RuntimeError(f"Noto'g'ri DB_POOL_PROFILE: {settings.DB_POOL_PROFILE} ({', '.join(POOL_PROFILES)})")
+    profile = dict(POOL_PROFILES[settings.DB_POOL_PROFILE])
+    overrides = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SEC,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SEC,
+        "pre_ping": settings.DB_PRE_PING or None,
+        "statement_timeout_ms": settings.DB_STATEMENT_TIMEOUT_MS,
+    }
+    profile.update({key: value for key, value in overrides.items() if value is not None})
+    if profile["pre_ping"] not in PRE_PING_STRATEGIES:
+        raise RuntimeError(f"Noto'g'ri DB_PRE_PING: {profile['pre_ping']} ({', '.join(PRE_PING_STRATEGIES)})")
+    return profile
+
+
+def sqlite_pragmas() -> Dict[str, Any]:
+    if settings.SQLITE_PRAGMA_PROFILE not in SQLITE_PRAGMA_PROFILES:
+        raise RuntimeError(
+            f"Noto'g'ri SQLITE_PRAGMA_PROFILE: {settings.SQLITE_PRAGMA_PROFILE} ({', '.join(SQLITE_PRAGMA_PROFILES)})"
+        )
+    pragmas = dict(SQLITE_PRAGMA_PROFILES[settings.SQLITE_PRAGMA_PROFILE])
+    overrides = {
+        "synchronous": settings.SQLITE_SYNCHRONOUS or None,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        # Negative cache_size is in KiB rather than pages.
+        "cache_size": -settings.SQLITE_CACHE_SIZE_KB if settings.SQLITE_CACHE_SIZE_KB is not None else None,
+        "mmap_size": settings.SQLITE_MMAP_SIZE_MB * 1024 * 1024 if settings.SQLITE_MMAP_SIZE_MB is not None else None,
+    }
+    pragmas.update({key: value for key, value in overrides.items() if value is not None})
+    if "synchronous" in pragmas and pragmas["synchronous"] not in SQLITE_SYNCHRONOUS_MODES:
+        raise RuntimeError(f"Noto'g'ri SQLITE_SYNCHRONOUS: {pragmas['synchronous']} ({', '.join(SQLITE_SYNCHRONOUS_MODES)})")
+    return pragmas
+
+
+def _install_sqlite_pragmas(target: Engine, pragmas: Dict[str, Any]) -> None:
+    if not pragmas:
+        return
+
+    @event.listens_for(target, "connect")
+    def _on_connect(dbapi_conn, record) -> None:
+        cursor = dbapi_conn.cursor()
+        try:
+            # journal_mode=WAL is stored in the file; in-memory databases
+            # silently stay in "memory" mode.
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+_last_saturation_log = 0.0
+
+
+class _TimedCheckout:
+    # Times the public Pool.connect(), which every engine checkout (Session,
+    # engine.begin(), the async engine) goes through and where it blocks once
+    # all connections are in use.
+    def __init__(self, creator, pool_size: int = 5, max_overflow: int = 10, **kw: Any) -> None:
+        super().__init__(creator, pool_size=pool_size, max_overflow=max_overflow, **kw)
+        # None: unlimited overflow, so the pool never saturates.
+        self.capacity = pool_size + max_overflow if max_overflow >= 0 else None
+
+    def connect(self):
+        global _last_saturation_log
+        started = time.perf_counter()
+        conn = super().connect()
+        waited_ms = (time.perf_counter() - started) * 1000.0
+        checked_out = self.checkedout()
+        if self.capacity is not None and checked_out >= self.capacity:
+            if time.monotonic() - _last_saturation_log >= 30:
+                _last_saturation_log = time.monotonic()
+                print(
+                    f"db pool saturated: {checked_out}/{self.capacity} connections checked out "
+                    f"({settings.DB_POOL_PROFILE})"
+                )
+        if waited_ms >= settings.DB_POOL_WAIT_LOG_MS:
+            print(f"db pool checkout waited {waited_ms:.0f}ms ({self.status()})")
+        return conn
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def _install_idle_ping(target: Engine, idle_sec: int) -> None:
+    # Pings only connections that sat in the pool longer than idle_sec, instead
+    # of a SELECT 1 on every checkout; a failed ping makes the pool reconnect.
+    @event.listens_for(target, "checkin")
+    def _on_checkin(dbapi_conn, record) -> None:
+        record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(target, "checkout")
+    def _on_checkout(dbapi_conn, record, proxy) -> None:
+        checked_in_at = record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_sec:
+            return
+        cursor = dbapi_conn.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        except Exception as err:
+            raise exc.DisconnectionError() from err
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+
+def _engine_budget(profile: Dict[str, Any]) -> Dict[str, int]:
+    parts = 2 if profile["async_engine"] else 1
+    return {
+        "pool_size": max(1, profile["pool_size"] // parts),
+        "max_overflow": max(0, profile["max_overflow"] // parts),
+    }
+
+
+def _server_engine_options(profile: Dict[str, Any], async_pool: bool = False) -> Dict[str, Any]:
+    connect_args: Dict[str, Any] = {}
+    if profile["statement_timeout_ms"]:
+        connect_args["options"] = f"-c statement_timeout={int(profile['statement_timeout_ms'])}"
+    return {
+        "poolclass": TimedAsyncQueuePool if async_pool else TimedQueuePool,
+        **_engine_budget(profile),
+        "pool_timeout": profile["pool_timeout"],
+        "pool_recycle": profile["pool_recycle"],
+        "pool_pre_ping": profile["pre_ping"] == "always",
+        "connect_args": connect_args,
+    }
+
+
+def _async_database_url(url: str) -> Optional[str]:
+    # psycopg 3 provides the async dialect under the same URL; SQLite has no
+    # async driver installed, so it keeps using the sync engine. The bot
+    # profile has no async engine, so it keeps the whole budget for sync.
+    if url.startswith("postgresql+psycopg://") and pool_profile()["async_engine"]:
+        return url
+    return None
+
+
+def _create_engine(url: str) -> Engine:
+    if url.startswith("sqlite"):
+        created = create_engine(url, future=True, pool_pre_ping=True, connect_args={"check_same_thread": False})
+        _install_sqlite_pragmas(created, sqlite_pragmas())
+        return created
+    profile = pool_profile()
+    created = create_engine(url, future=True, **_server_engine_options(profile))
+    if profile["pre_ping"] == "idle":
+        _install_idle_ping(created, settings.DB_PRE_PING_IDLE_SEC)
+    return created
+
+
+def _create_async_engine(url: str) -> AsyncEngine:
+    profile = pool_profile()
+    created = create_async_engine(url, **_server_engine_options(profile, async_pool=True))
+    if profile["pre_ping"] == "idle":
+        _install_idle_ping(created.sync_engine, settings.DB_PRE_PING_IDLE_SEC)
+    return created
+
+
+class RoutingSession(Session):
+    # Sessions marked with mark_read_only() send plain SELECTs to the replica.
+    # Flushes, DML and raw SQL go to the primary, and after the first of those
+    # the session stays on the primary so it reads its own writes.
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get("replica_bind")
+        if replica is not None and self.info.get("use_replica") and not self.info.get("pinned"):
+            if not self._flushing and getattr(clause, "is_select", False):
+                return replica
+            self.info["pinned"] = True
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
 DATABASE_URL = _normalize_database_url(settings.DATABASE_URL)
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+REPLICA_DATABASE_URL = _normalize_database_url(settings.DATABASE_REPLICA_URL)
+
+engine = _create_engine(DATABASE_URL)
+replica_engine = _create_engine(REPLICA_DATABASE_URL) if REPLICA_DATABASE_URL else None
+SessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    class_=RoutingSession,
+    info={"replica_bind": replica_engine} if replica_engine is not None else None,
+    future=True,
+)
+
+ASYNC_DATABASE_URL = _async_database_url(DATABASE_URL)
+async_engine = _create_async_engine(ASYNC_DATABASE_URL) if ASYNC_DATABASE_URL else None
+ASYNC_REPLICA_DATABASE_URL = _async_database_url(REPLICA_DATABASE_URL) if async_engine is not None else None
+replica_async_engine = _create_async_engine(ASYNC_REPLICA_DATABASE_URL) if ASYNC_REPLICA_DATABASE_URL else None
+AsyncSessionLocal = (
+    async_sessionmaker(
+        async_engine,
+        autoflush=False,
+        expire_on_commit=True,
+        sync_session_class=RoutingSession,
+        info={"replica_bind": replica_async_engine.sync_engine} if replica_async_engine is not None else None,
+    )
+    if async_engine is not None
+    else None
+)
+
+# key -> monotonic deadline; see stick_to_primary().
+_sticky_until: Dict[str, float] = {}
+
+
+def stick_to_primary(key: Any) -> None:
+    # After a write for key (a tg_user_id), its reads skip the replica for
+    # DB_REPLICA_STICKY_SEC so the user sees their own change despite lag.
+    # Per process: writes made by the other service are not tracked.
+    if replica_engine is None or key is None:
+        return
+    now = time.monotonic()
+    if len(_sticky_until) >= 10000:
+        for stale in [k for k, until in list(_sticky_until.items()) if until <= now]:
+            _sticky_until.pop(stale, None)
+    _sticky_until[str(key)] = now + settings.DB_REPLICA_STICKY_SEC
+
 
-engine = create_engine(DATABASE_URL, future=True, pool_pre_ping=True, connect_args=connect_args)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
+def mark_read_only(db: Union[Session, AsyncSession], key: Any = None) -> None:
+    # Lets db read from the replica unless key wrote within the sticky window.
+    if key is not None and _sticky_until.get(str(key), 0.0) > time.monotonic():
+        return
+    db.info["use_replica"] = True
@@ -0,0 +1,164 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple, TypeVar
+
+from sqlalchemy.orm import Session, SessionTransaction, sessionmaker
+
+from app.config import settings
+from app.db import IS_SQLITE, engine
+
+T = TypeVar("T")
+
+
+class GroupCommitSession(Session):
+    # Session handed to writer jobs. Each job runs inside its own SAVEPOINT of
+    # the batch transaction, so job code written for a normal session keeps
+    # working: commit() marks a savepoint boundary and rollback() undoes the
+    # job's work back to its last commit(). The writer commits the batch.
+    job_savepoint: Optional[SessionTransaction] = None
+
+    def savepoint_open(self) -> bool:
+        # Still needs a commit or rollback; a failed flush leaves it inactive
+        # but open.
+        return self.job_savepoint is not None and self.get_nested_transaction() is self.job_savepoint
+
+    def commit(self) -> None:
+        if self.job_savepoint is None:
+            return super().commit()
+        if self.savepoint_open():
+            self.job_savepoint.commit()
+        self.job_savepoint = self.begin_nested()
+
+    def rollback(self) -> None:
+        if self.job_savepoint is None:
+            return super().rollback()
+        if self.savepoint_open():
+            self.job_savepoint.rollback()
+        self.job_savepoint = self.begin_nested()
+
+
+_Job = Tuple[Callable[..., Any], Tuple[Any, ...], Future]
+
+
+class GroupCommitWriter:
+    # One thread owns every write transaction of the process. Jobs submitted
+    # while a commit is in flight are coalesced into the next transaction
+    # (group commit), so a burst costs one lock acquisition and one fsync per
+    # batch instead of one per request.
+    def __init__(self, session_factory: sessionmaker, max_batch: int = 64, max_wait_ms: float = 2.0) -> None:
+        self.session_factory = session_factory
+        self.max_batch = max(1, max_batch)
+        self.max_wait_sec = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[Optional[_Job]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, fn: Callable[..., T], *args: Any) -> "Future[T]":
+        # fn(db, *args) runs on the writer thread; the future resolves after
+        # the batch containing it has committed. Return plain values or
+        # objects that are safe to read after the session closes.
+        future: "Future[T]" = Future()
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+            self._queue.put((fn, args, future))
+        return future
+
+    def stop(self, timeout: float = 10.0) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                return
+            self._queue.put(None)
+        thread.join(timeout)
+
+    def _next_batch(self) -> Tuple[List[_Job], bool]:
+        first = self._queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_sec
+        while len(batch) < self.max_batch:
+            try:
+                remaining = deadline - time.monotonic()
+                job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                return batch, True
+            batch.append(job)
+        return batch, False
+
+    def _run(self) -> None:
+        while True:
+            batch, stopping = self._next_batch()
+            if batch:
+                self._commit_batch(batch)
+            if stopping:
+                return
+
+    def _commit_batch(self, batch: List[_Job]) -> None:
+        outcomes: List[Tuple[Future, Any, Optional[BaseException]]] = []
+        try:
+            with self.session_factory() as db:
+                if db.get_bind().dialect.name == "sqlite":
+                    # Take the write lock up front: a deferred transaction that
+                    # starts with a read can fail to upgrade under contention.
+                    db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+                for fn, args, future in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    db.job_savepoint = db.begin_nested()
+                    try:
+                        result = fn(db, *args)
+                        if db.savepoint_open():
+                            db.job_savepoint.commit()
+                        outcomes.append((future, result, None))
+                    except Exception as exc:
+                        if db.savepoint_open():
+                            db.job_savepoint.rollback()
+                        outcomes.append((future, None, exc))
+                    finally:
+                        db.job_savepoint = None
+                db.commit()
+        except Exception as exc:
+            print(f"db writer: batch of {len(batch)} failed: {exc}")
+            for _fn, _args, future in batch:
+                if future.running():
+                    future.set_exception(exc)
+            return
+        for future, result, exc in outcomes:
+            if exc is None:
+                future.set_result(result)
+            else:
+                future.set_exception(exc)
+
+
+WRITER_ENABLED = settings.DB_WRITER_ENABLED and IS_SQLITE
+WriterSessionLocal = sessionmaker(
+    bind=engine, class_=GroupCommitSession, autoflush=False, expire_on_commit=False, future=True
+)
+writer = GroupCommitWriter(WriterSessionLocal, settings.DB_WRITER_MAX_BATCH, settings.DB_WRITER_MAX_WAIT_MS)
+
+
+def commit_write(db: Session, fn: Callable[..., T], *args: Any) -> T:
+    # Runs the mutation fn(db, *args) and commits it. With the writer enabled
+    # the work moves to the writer thread and this call blocks until its batch
+    # commits; db is only used for reads, so it must not hold pending changes.
+    if not WRITER_ENABLED or isinstance(db, GroupCommitSession):
+        result = fn(db, *args)
+        db.commit()
+        return result
+    if db.new or db.dirty or db.deleted:
+        raise RuntimeError("commit_write: session has pending changes outside the writer")
+    # End the read transaction so the caller sees the batch once it commits.
+    db.rollback()
+    return writer.submit(fn, *args).result()
+
+
+def stop_writer() -> None:
+    if WRITER_ENABLED:
+        writer.stop()
@@ -1,14 +1,22 @@
 from app.models.base import Base
 from app.models.activation_code import ActivationCode
 from app.models.audit_log import AuditLog
+from app.models.broadcast import Broadcast
 from app.models.cashback import Cashback
 from app.models.challenge import Challenge
 from app.models.daily_module_report import DailyModuleReport
+from app.models.daily_plan import DailyPlan
+from app.models.daily_submission import DailySubmission
 from app.models.habit_definition import HabitDefinition
 from app.models.habit_report import HabitReport
+from app.models.job_lease import JobLease
+from app.models.job_run import JobRun
+from app.models.job_worker import JobWorker
 from app.models.onboarding_answer import OnboardingAnswer
+from app.models.outbox_message import OutboxMessage
 from app.models.payment_transaction import PaymentTransaction
 from app.models.referral import Referral
+from app.models.reminder_slot import ReminderSlot
 from app.models.user import User
 from app.models.user_achievement import UserAchievement
 
@@ -16,14 +24,22 @@ __all__ = [
     "Base",
     "ActivationCode",
     "AuditLog",
+    "Broadcast",
     "User",
     "HabitDefinition",
     "HabitReport",
+    "JobLease",
+    "JobRun",
+    "JobWorker",
     "Referral",
     "OnboardingAnswer",
+    "OutboxMessage",
     "DailyModuleReport",
+    "DailyPlan",
+    "DailySubmission",
     "Challenge",
     "Cashback",
     "PaymentTransaction",
+    "ReminderSlot",
     "UserAchievement",
 ]
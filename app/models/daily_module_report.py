@@ -1,6 +1,6 @@
 from datetime import date, datetime
 
-from sqlalchemy import Boolean, Date, DateTime, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy import Boolean, Date, DateTime, ForeignKey, Index, Integer, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import Base
@@ -10,6 +10,7 @@ class DailyModuleReport(Base):
     __tablename__ = "daily_module_reports"
     __table_args__ = (
         UniqueConstraint("user_id", "report_date", "module", "item_key", name="uq_daily_module_report"),
+        Index("ix_daily_module_reports_date_user_done", "report_date", "user_id", "is_done"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
@@ -0,0 +1,20 @@
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class DailyPlan(Base):
+    # Snapshot of a user's checklist for one day, built once from the setup JSON.
+    __tablename__ = "daily_plans"
+    __table_args__ = (UniqueConstraint("plan_date", "user_id", name="uq_daily_plan_date_user"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    plan_date: Mapped[date] = mapped_column(Date)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    plan_json: Mapped[str] = mapped_column(Text)
+    modules: Mapped[str] = mapped_column(String(64), default="")
+    total_items: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,27 @@
+from datetime import date, datetime
+
+from typing import Optional
+
+from sqlalchemy import Boolean, Date, DateTime, ForeignKey, Index, Integer, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class DailySubmission(Base):
+    # One row per participant per day: written on each report submission and
+    # completed for non-submitters by the day-close job.
+    __tablename__ = "daily_submissions"
+    __table_args__ = (
+        UniqueConstraint("report_date", "user_id", name="uq_daily_submission_date_user"),
+        Index("ix_daily_submissions_date_submitted", "report_date", "submitted"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    report_date: Mapped[date] = mapped_column(Date)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    submitted: Mapped[bool] = mapped_column(Boolean, default=False)
+    done: Mapped[int] = mapped_column(Integer, default=0)
+    total: Mapped[int] = mapped_column(Integer, default=0)
+    score: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
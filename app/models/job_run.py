@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class JobRun(Base):
+    __tablename__ = "job_runs"
+    __table_args__ = (Index("ix_job_runs_job_started", "job_name", "started_at"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    job_name: Mapped[str] = mapped_column(String(64))
+    status: Mapped[str] = mapped_column(String(16), default="ok")
+    error: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    duration_ms: Mapped[int] = mapped_column(Integer, default=0)
+    users_scanned: Mapped[int] = mapped_column(Integer, default=0)
+    messages_queued: Mapped[int] = mapped_column(Integer, default=0)
+    messages_sent: Mapped[int] = mapped_column(Integer, default=0)
+    messages_failed: Mapped[int] = mapped_column(Integer, default=0)
+    errors_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Job-specific result counts, e.g. day-close's submitted/missed.
+    details_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    db_ms: Mapped[int] = mapped_column(Integer, default=0)
+    send_ms: Mapped[int] = mapped_column(Integer, default=0)
+    send_p50_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    send_p95_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
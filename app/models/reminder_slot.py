@@ -0,0 +1,18 @@
+from sqlalchemy import ForeignKey, Index, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class ReminderSlot(Base):
+    __tablename__ = "reminder_slots"
+    __table_args__ = (
+        UniqueConstraint("user_id", "local_hour", name="uq_reminder_slot_user_hour"),
+        Index("ix_reminder_slots_tz_hour", "timezone", "local_hour"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    timezone: Mapped[str] = mapped_column(String(64))
+    local_hour: Mapped[int] = mapped_column(Integer)
+    slot: Mapped[str] = mapped_column(String(16))
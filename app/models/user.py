@@ -35,15 +35,18 @@ class User(Base):
     reading_book: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     reading_task: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     reminder_hours_json: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    timezone: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
     payment_status: Mapped[str] = mapped_column(String(32), default="unpaid")
     payment_confirmed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     streak_freeze_used: Mapped[bool] = mapped_column(Boolean, default=False)
     missed_days_count: Mapped[int] = mapped_column(Integer, default=0)
-    last_report_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    last_report_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True, index=True)
     last_weekly_review_sent_at: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
     certificate_issued: Mapped[bool] = mapped_column(Boolean, default=False)
     certificate_code: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
     device_fingerprint: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
     device_bound_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    blocked_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    blocked_reason: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
     cashback_balance_uzs: Mapped[int] = mapped_column(Integer, default=0)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,356 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import resource
+import socket
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List
+from urllib.parse import parse_qs
+from zoneinfo import ZoneInfo
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+BENCH_TOKEN = "123456:bench"
+BENCH_TZ = "Asia/Tashkent"
+JOBS = ("remindnow", "reminder-tick", "weekly-review", "daily-plans", "day-close")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _serve_fake_api(port: int, latency_ms: float, jitter_ms: float, error_rate: float, retry_after_rate: float, retry_after_sec: int) -> None:
+    # Minimal Bot API: getMe, sendMessage/sendDocument with injected latency,
+    # 403s and 429 RetryAfter; everything else answers ok.
+    import uvicorn
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse
+
+    api = FastAPI()
+    counts: Dict[str, int] = {"requests": 0, "sent": 0, "forbidden": 0, "retry_after": 0}
+    rng = random.Random(42)
+
+    @api.get("/stats")
+    def stats() -> Dict[str, int]:
+        return counts
+
+    @api.post("/bot{token}/{method}")
+    async def call(token: str, method: str, request: Request) -> Dict:
+        counts["requests"] += 1
+        if method == "getMe":
+            return {"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}}
+        if method not in ("sendMessage", "sendDocument"):
+            return {"ok": True, "result": True}
+
+        params = {k: v[0] for k, v in parse_qs((await request.body()).decode("utf-8", "ignore")).items()}
+        delay = max(0.0, latency_ms + rng.uniform(-jitter_ms, jitter_ms)) / 1000.0
+        if delay:
+            await asyncio.sleep(delay)
+        roll = rng.random()
+        # Real status codes: PTB maps 429 to RetryAfter and 403 to Forbidden
+        # only from the HTTP status, not from the JSON body.
+        if roll < retry_after_rate:
+            counts["retry_after"] += 1
+            return JSONResponse(
+                status_code=429,
+                content={
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {retry_after_sec}",
+                    "parameters": {"retry_after": retry_after_sec},
+                },
+            )
+        if roll < retry_after_rate + error_rate:
+            counts["forbidden"] += 1
+            return JSONResponse(
+                status_code=403,
+                content={"ok": False, "error_code": 403, "description": "Forbidden: bot was blocked by the user"},
+            )
+
+        counts["sent"] += 1
+        return {
+            "ok": True,
+            "result": {
+                "message_id": counts["sent"],
+                "date": int(time.time()),
+                "chat": {"id": int(params.get("chat_id", 0) or 0), "type": "private"},
+                "text": params.get("text", ""),
+            },
+        }
+
+    uvicorn.run(api, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+def _fake_api_stats(port: int) -> Dict[str, int]:
+    import httpx
+
+    return httpx.get(f"http://127.0.0.1:{port}/stats", timeout=5).json()
+
+
+def _wait_for_port(port: int, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("fake Bot API ishga tushmadi")
+
+
+def _seed(users: int, report_share: float, slot_hour: int) -> None:
+    from sqlalchemy import func, insert, select
+
+    from app.db import SessionLocal
+    from app.models import DailyModuleReport, ReminderSlot, User
+
+    today = date.today()
+    with SessionLocal() as db:
+        if db.scalar(select(func.count()).select_from(User)):
+            raise RuntimeError("Benchmark bo'sh bazani talab qiladi (users jadvali bo'sh emas)")
+        for start in range(0, users, 5000):
+            db.execute(
+                insert(User),
+                [
+                    {
+                        "tg_user_id": 10_000_000 + i,
+                        "username": f"bench{i}",
+                        "first_name": "Bench",
+                        "is_paid": True,
+                        "payment_status": "paid",
+                        "status": "active",
+                        "onboarding_completed": True,
+                        "registration_completed": True,
+                        "selected_modules_json": '["habits","sports","reading"]',
+                        "habits_json": '[{"name":"Erta turish","days":["daily"]},{"name":"Suv","days":["daily"]}]',
+                        "sports_json": '[{"name":"Push-up","days":["daily"],"target_count":30}]',
+                        "reminder_hours_json": "9,14,21",
+                        "timezone": BENCH_TZ,
+                        "marathon_start_date": today - timedelta(days=10),
+                        "current_streak": i % 12,
+                        "last_report_date": today - timedelta(days=1 + i % 5),
+                    }
+                    for i in range(start, min(users, start + 5000))
+                ],
+            )
+        db.commit()
+
+        ids = list(db.scalars(select(User.id).order_by(User.id)))
+        db.execute(insert(ReminderSlot), [{"user_id": uid, "timezone": BENCH_TZ, "local_hour": slot_hour, "slot": "night"} for uid in ids])
+        reporters = ids[: int(len(ids) * report_share)]
+        for start in range(0, len(reporters), 5000):
+            rows = []
+            for uid in reporters[start : start + 5000]:
+                for back in range(0, 7):
+                    rows.append(
+                        {
+                            "user_id": uid,
+                            "report_date": today - timedelta(days=back),
+                            "module": "habits",
+                            "item_key": "Erta turish",
+                            "is_done": (uid + back) % 3 != 0,
+                        }
+                    )
+            db.execute(insert(DailyModuleReport), rows)
+        db.commit()
+
+
+def _delivery_state() -> Dict[str, int]:
+    from sqlalchemy import func, select
+
+    from app.db import SessionLocal
+    from app.models import OutboxMessage, User
+
+    with SessionLocal() as db:
+        by_status = dict(db.execute(select(OutboxMessage.status, func.count()).group_by(OutboxMessage.status)).all())
+        return {
+            "blocked": db.scalar(select(func.count()).select_from(User).where(User.blocked_at.is_not(None))) or 0,
+            "failed": by_status.get("failed", 0),
+            "unsent": by_status.get("pending", 0) + by_status.get("sending", 0),
+            "other_errors": db.scalar(
+                select(func.count())
+                .select_from(OutboxMessage)
+                .where(OutboxMessage.last_error.is_not(None), OutboxMessage.last_error != "Forbidden")
+            )
+            or 0,
+        }
+
+
+def _check_delivery(name: str, forbidden: int, before: Dict[str, int], after: Dict[str, int]) -> None:
+    # Every injected 403 must block exactly one chat and fail its row; 429s are
+    # retried by the dispatcher, so nothing may be left unsent.
+    problems = []
+    if after["blocked"] - before["blocked"] != forbidden:
+        problems.append(f"blocked {after['blocked'] - before['blocked']} != forbidden {forbidden}")
+    if after["failed"] - before["failed"] != forbidden:
+        problems.append(f"failed {after['failed'] - before['failed']} != forbidden {forbidden}")
+    if after["unsent"]:
+        problems.append(f"{after['unsent']} outbox rows still pending")
+    if after["other_errors"]:
+        problems.append(f"{after['other_errors']} rows failed with an unexpected error")
+    if problems:
+        raise RuntimeError(f"{name}: {'; '.join(problems)}")
+
+
+class _Sunday(date):
+    @classmethod
+    def today(cls) -> date:
+        today = date.today()
+        return today + timedelta(days=(6 - today.weekday()) % 7)
+
+
+async def _run_job(name: str, main_module, context) -> None:
+    if name == "remindnow":
+        await main_module._send_module_reminders(context, "night")
+    elif name == "reminder-tick":
+        await main_module.reminder_tick_job(context)
+    elif name == "weekly-review":
+        # The job only runs on Sundays; pretend today is one.
+        real_date = main_module.date
+        main_module.date = _Sunday
+        try:
+            await main_module.weekly_review_job(context)
+        finally:
+            main_module.date = real_date
+    elif name == "daily-plans":
+        await main_module.daily_plan_job(context)
+    elif name == "day-close":
+        await main_module.day_close_job(context)
+
+
+async def _bench(args: argparse.Namespace, port: int) -> List[Dict]:
+    from sqlalchemy import event
+    from telegram.ext import Application
+
+    import main as bot_main
+    from app.db import engine
+
+    queries = {"count": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(*_args) -> None:
+        queries["count"] += 1
+
+    app = (
+        Application.builder()
+        .token(BENCH_TOKEN)
+        .base_url(f"http://127.0.0.1:{port}/bot")
+        .connection_pool_size(max(64, args.concurrency * 2))
+        .build()
+    )
+    results: List[Dict] = []
+    async with app:
+        # No job queue: _kick_outbox drains inline, so each job runs to delivery.
+        context = SimpleNamespace(bot=app.bot, job_queue=None, job=None, application=app)
+        bot_main._active_role = "all"
+        for name in args.jobs:
+            before = _fake_api_stats(port)
+            state_before = _delivery_state()
+            queries_before = queries["count"]
+            started = time.perf_counter()
+            await _run_job(name, bot_main, context)
+            wall = time.perf_counter() - started
+            after = _fake_api_stats(port)
+            sent = after["sent"] - before["sent"]
+            _check_delivery(name, after["forbidden"] - before["forbidden"], state_before, _delivery_state())
+            results.append(
+                {
+                    "job": name,
+                    "users": args.users,
+                    "wall_sec": round(wall, 3),
+                    "sent": sent,
+                    "forbidden": after["forbidden"] - before["forbidden"],
+                    "retry_after": after["retry_after"] - before["retry_after"],
+                    "msgs_per_sec": round(sent / wall, 1) if wall else 0.0,
+                    "queries": queries["count"] - queries_before,
+                    "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1),
+                }
+            )
+            print(json.dumps(results[-1]), flush=True)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bot job fan-out benchmark against a local fake Bot API")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--jobs", default=",".join(JOBS), help=f"vergul bilan: {', '.join(JOBS)}")
+    parser.add_argument("--database-url", default="", help="bo'sh baza; default vaqtinchalik SQLite fayl")
+    parser.add_argument("--report-share", type=float, default=0.6, help="hisobot yuborgan userlar ulushi")
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.01, help="403 Forbidden ulushi")
+    parser.add_argument("--retry-after-rate", type=float, default=0.0005, help="429 RetryAfter ulushi")
+    parser.add_argument("--retry-after-sec", type=int, default=1)
+    parser.add_argument("--rate", type=float, default=1000.0, help="BOT_SEND_RATE_PER_SEC")
+    parser.add_argument("--concurrency", type=int, default=64, help="BOT_SEND_CONCURRENCY")
+    parser.add_argument("--json", default="", help="natijalarni shu faylga yozish")
+    args = parser.parse_args()
+    args.jobs = [job.strip() for job in args.jobs.split(",") if job.strip()]
+    unknown = [job for job in args.jobs if job not in JOBS]
+    if unknown:
+        parser.error(f"noma'lum job: {', '.join(unknown)}")
+
+    tmp_dir = None
+    if not args.database_url:
+        tmp_dir = tempfile.TemporaryDirectory(prefix="intizomli-bench-")
+        args.database_url = f"sqlite:///{tmp_dir.name}/bench.db"
+    # Settings are read at import time, so the environment goes first.
+    os.environ.update(
+        {
+            "DATABASE_URL": args.database_url,
+            "BOT_TOKEN": BENCH_TOKEN,
+            "BOT_TIMEZONE": BENCH_TZ,
+            "ADMIN_TG_IDS": "",
+            "BOT_SEND_RATE_PER_SEC": str(args.rate),
+            "BOT_SEND_CONCURRENCY": str(args.concurrency),
+            "BOT_CHAT_MIN_INTERVAL_SEC": "0",
+            "REMINDER_SPREAD_MINUTES": "0",
+        }
+    )
+
+    from app.db import engine
+    from app.models import Base
+
+    Base.metadata.create_all(bind=engine)
+    now = (datetime.now(timezone.utc) + timedelta(minutes=5)).replace(minute=0, second=0, microsecond=0)
+    started = time.perf_counter()
+    _seed(args.users, args.report_share, now.astimezone(ZoneInfo(BENCH_TZ)).hour)
+    print(f"seed: {args.users} users in {time.perf_counter() - started:.1f}s ({args.database_url})", flush=True)
+
+    port = _free_port()
+    server = multiprocessing.get_context("spawn").Process(
+        target=_serve_fake_api,
+        args=(port, args.latency_ms, args.jitter_ms, args.error_rate, args.retry_after_rate, args.retry_after_sec),
+        daemon=True,
+    )
+    server.start()
+    try:
+        _wait_for_port(port)
+        results = asyncio.run(_bench(args, port))
+    finally:
+        server.terminate()
+        server.join(5)
+        if tmp_dir:
+            tmp_dir.cleanup()
+
+    print()
+    print(f"{'job':<15}{'wall s':>9}{'sent':>9}{'msg/s':>9}{'queries':>9}{'rss MB':>9}")
+    for row in results:
+        print(f"{row['job']:<15}{row['wall_sec']:>9}{row['sent']:>9}{row['msgs_per_sec']:>9}{row['queries']:>9}{row['peak_rss_mb']:>9}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
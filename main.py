@@ -1,23 +1,91 @@
+import argparse
+import asyncio
 import json
 import io
 import os
 import random
+import signal
 import string
-from datetime import date, datetime, timedelta
+import time
+import zlib
+from datetime import date, datetime, timedelta, timezone, tzinfo
 from datetime import time as dtime
 from pathlib import Path
-from typing import List
+from typing import Callable, Dict, List, Optional, Tuple
 from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from zoneinfo import ZoneInfo
 
+import uvicorn
 from dotenv import load_dotenv
 from sqlalchemy import and_, delete, func, select
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update, WebAppInfo
 from telegram.ext import Application, CallbackQueryHandler, CommandHandler, ContextTypes, MessageHandler, filters
 
-from app.crud import create_referral, get_referral_count, get_reportable_users, get_user_by_tg_id, upsert_user
-from app.db import SessionLocal
-from app.models import ActivationCode, AuditLog, Challenge, DailyModuleReport, PaymentTransaction, Referral, User
+from app.crud import (
+    close_day,
+    count_segment,
+    create_broadcast,
+    create_referral,
+    count_missed_users,
+    count_submitted_users,
+    get_active_broadcasts,
+    get_referral_count,
+    get_due_reminders,
+    get_missed_users,
+    get_submitted_users,
+    get_plan_summaries,
+    get_report_stats_by_user,
+    get_segment_snapshots,
+    get_user_by_tg_id,
+    get_user_snapshots,
+    invalidate_daily_plan,
+    mark_user_reachable,
+    materialize_daily_plans,
+    parse_segment,
+    reminder_buckets,
+    reportable_user_clause,
+    upsert_user,
+)
+from app.bot import (
+    CachedUser,
+    OutgoingMessage,
+    begin_leasing,
+    broadcast_progress_text,
+    broadcast_segment,
+    build_webhook_api,
+    dispatcher,
+    drain_outbox,
+    enqueue_broadcast_chunk,
+    enqueue_messages,
+    finish_broadcast_enqueue,
+    heartbeat_leases,
+    owns_global_jobs,
+    prune_outbox,
+    refresh_broadcast_progress,
+    release_leases,
+    run_db,
+    run_read,
+    run_write,
+    shard_criteria,
+    snapshot_user,
+    track_job_run,
+    user_cache,
+)
+from app.config import settings
+from app.db_writer import stop_writer
+from app.models import (
+    ActivationCode,
+    AuditLog,
+    Broadcast,
+    Challenge,
+    DailyModuleReport,
+    DailyPlan,
+    DailySubmission,
+    PaymentTransaction,
+    Referral,
+    ReminderSlot,
+    User,
+)
 
 ROOT_DIR = Path(__file__).resolve().parent
 load_dotenv(ROOT_DIR / ".env")
@@ -58,6 +126,12 @@ def _parse_reminder_hours(raw: str) -> List[int]:
 REMINDER_HOURS = _parse_reminder_hours(os.getenv("REMINDER_HOURS", "9,14,21"))
 ADMIN_TG_IDS = {int(x.strip()) for x in os.getenv("ADMIN_TG_IDS", "").split(",") if x.strip().isdigit()}
 ACTIVATION_CODE_TTL_HOURS = int(os.getenv("ACTIVATION_CODE_TTL_HOURS", "720"))
+BOT_ROLES = ("all", "updates", "jobs")
+BOT_MODES = ("polling", "webhook")
+_active_role = "all"
+_outbox_pruned_at = 0.0
+OUTBOX_PRUNE_INTERVAL_SEC = 3600
+OUTBOX_PRUNE_CHUNK = 5000
 RETENTION_DAYS = [int(x.strip()) for x in os.getenv("RETENTION_DAYS", "2,3,5").split(",") if x.strip().isdigit()]
 
 
@@ -80,6 +154,12 @@ def main_menu() -> InlineKeyboardMarkup:
     )
 
 
+def _miniapp_button() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        [[InlineKeyboardButton("📱 Mini Appni ochish", web_app=WebAppInfo(url=build_miniapp_url()))]]
+    )
+
+
 def intro_menu() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
         [[InlineKeyboardButton("✅ O'qib tanishib chiqdim", callback_data="intro:ok")]]
@@ -107,13 +187,17 @@ def _gen_code(length: int = 8) -> str:
     return "".join(random.choice(chars) for _ in range(length))
 
 
-def _reminder_slot(hour: int) -> str:
-    hours = sorted(REMINDER_HOURS[:3]) if REMINDER_HOURS else [9, 14, 21]
-    if hour == hours[0]:
-        return "morning"
-    if len(hours) > 1 and hour == hours[1]:
-        return "midday"
-    return "night"
+def _server_tz() -> tzinfo:
+    # Report, plan and ledger dates all come from the server's date.today(),
+    # so jobs that roll the day over run at the server's midnight.
+    return datetime.now().astimezone().tzinfo
+
+
+def _bot_tz() -> ZoneInfo:
+    try:
+        return ZoneInfo(BOT_TIMEZONE)
+    except Exception:
+        return ZoneInfo("UTC")
 
 
 def _user_label(user: User) -> str:
@@ -123,18 +207,35 @@ def _user_label(user: User) -> str:
     return f"{name} [{user.tg_user_id}]"
 
 
+async def _seen_user(tg_user) -> CachedUser:
+    # Menu taps with an unchanged Telegram profile are served from the cache.
+    cached = user_cache.get(tg_user.id, tg_user.username, tg_user.first_name)
+    if cached:
+        return cached
+
+    def work(db) -> CachedUser:
+        return snapshot_user(upsert_user(db, tg_user.id, tg_user.username, tg_user.first_name))
+
+    return user_cache.put(await run_db(work))
+
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     tg_user = update.effective_user
     ref_code = context.args[0] if context.args else ""
 
-    with SessionLocal() as db:
+    def work(db) -> CachedUser:
         user = upsert_user(db, tg_user.id, tg_user.username, tg_user.first_name)
+        # A fresh /start means the chat is reachable again after a block.
+        cached = snapshot_user(mark_user_reachable(db, user))
         if ref_code.startswith("ref_"):
             try:
                 referrer_id = int(ref_code.replace("ref_", "", 1))
                 create_referral(db, referrer_id, tg_user.id)
             except ValueError:
                 pass
+        return cached
+
+    user_cache.put(await run_write(work))
 
     await update.message.reply_text(
         "🔥 *INTIZOMLI ERKAK MARAFONI*\n\n"
@@ -158,14 +259,12 @@ async def on_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     q = update.callback_query
     await q.answer()
 
-    with SessionLocal() as db:
-        user = upsert_user(db, q.from_user.id, q.from_user.username, q.from_user.first_name)
+    user = await _seen_user(q.from_user)
 
     key = q.data.split(":", 1)[1]
 
     if key == "ref":
-        with SessionLocal() as db:
-            ref_count = get_referral_count(db, q.from_user.id)
+        ref_count = await run_db(get_referral_count, q.from_user.id)
         bot_username = context.bot.username or "YOUR_BOT_USERNAME"
         text = (
             "🤝 *Referal*\n\n"
@@ -206,8 +305,7 @@ async def on_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
 async def on_intro(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     q = update.callback_query
     await q.answer()
-    with SessionLocal() as db:
-        user = upsert_user(db, q.from_user.id, q.from_user.username, q.from_user.first_name)
+    user = await _seen_user(q.from_user)
     state = "aktiv ✅" if user.payment_status == "paid" else "to'lov kutilmoqda"
     await q.edit_message_text(
         "🔥 *INTIZOMLI ERKAK*\n\n"
@@ -250,8 +348,8 @@ async def create_code(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         await update.message.reply_text("❌ tg_user_id noto'g'ri.")
         return
 
-    code = _gen_code()
-    with SessionLocal() as db:
+    def work(db) -> str:
+        code = _gen_code()
         # Ensure unique code.
         while db.scalar(select(ActivationCode).where(ActivationCode.code == code)):
             code = _gen_code()
@@ -265,6 +363,9 @@ async def create_code(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
             )
         )
         db.commit()
+        return code
+
+    code = await run_write(work)
 
     await update.message.reply_text(
         f"✅ Aktivatsiya kodi yaratildi:\n`{code}`\n\nUser: `{target_tg_user_id}`",
@@ -289,8 +390,8 @@ async def create_codes(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         await update.message.reply_text("Count 1..500 oralig'ida bo'lsin.")
         return
 
-    created: List[str] = []
-    with SessionLocal() as db:
+    def work(db) -> List[str]:
+        created: List[str] = []
         for _ in range(count):
             code = _gen_code()
             while db.scalar(select(ActivationCode).where(ActivationCode.code == code)):
@@ -306,7 +407,9 @@ async def create_codes(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             )
             created.append(code)
         db.commit()
+        return created
 
+    created = await run_write(work)
     text = "✅ Maxsus kodlar yaratildi:\n\n" + "\n".join(created)
     for i in range(0, len(text), 3900):
         await update.message.reply_text(text[i : i + 3900])
@@ -317,14 +420,16 @@ async def reset_me(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not tg_user:
         return
 
-    with SessionLocal() as db:
+    def work(db) -> bool:
         user = get_user_by_tg_id(db, tg_user.id)
         if not user:
-            await update.message.reply_text("Siz uchun saqlangan profil topilmadi. /start bosing.")
-            return
+            return False
 
         db.execute(delete(DailyModuleReport).where(DailyModuleReport.user_id == user.id))
+        db.execute(delete(DailySubmission).where(DailySubmission.user_id == user.id))
+        db.execute(delete(DailyPlan).where(DailyPlan.user_id == user.id))
         db.execute(delete(Challenge).where(Challenge.user_id == user.id))
+        db.execute(delete(ReminderSlot).where(ReminderSlot.user_id == user.id))
         db.execute(delete(PaymentTransaction).where(PaymentTransaction.user_id == user.id))
         db.execute(
             delete(Referral).where(
@@ -376,7 +481,15 @@ async def reset_me(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         user.certificate_issued = False
         user.certificate_code = None
         db.add(user)
+        invalidate_daily_plan(db, user.id)
         db.commit()
+        return True
+
+    found = await run_write(work)
+    user_cache.invalidate(tg_user.id)
+    if not found:
+        await update.message.reply_text("Siz uchun saqlangan profil topilmadi. /start bosing.")
+        return
 
     await update.message.reply_text(
         "✅ Profilingiz reset qilindi.\n"
@@ -391,34 +504,35 @@ async def admin_stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         return
 
     today = date.today()
-    with SessionLocal() as db:
+
+    def work(db) -> tuple:
         total_users = db.scalar(select(func.count()).select_from(User)) or 0
         paid_users = db.scalar(select(func.count()).select_from(User).where(User.payment_status == "paid")) or 0
         active_users = db.scalar(select(func.count()).select_from(User).where(User.status == "active")) or 0
-        paid_user_rows = list(db.scalars(select(User).where(User.payment_status == "paid").order_by(User.created_at.desc())))
-        submitted_internal_ids = set(
-            db.scalars(
-                select(DailyModuleReport.user_id)
-                .where(DailyModuleReport.report_date == today)
-                .group_by(DailyModuleReport.user_id)
-            )
+        return (
+            total_users,
+            paid_users,
+            active_users,
+            count_submitted_users(db, today),
+            count_missed_users(db, today),
+            get_submitted_users(db, today, limit=50),
+            get_missed_users(db, today, limit=50),
         )
 
-    submitted = [u for u in paid_user_rows if u.id in submitted_internal_ids]
-    missed = [u for u in paid_user_rows if u.id not in submitted_internal_ids]
+    total_users, paid_users, active_users, submitted_count, missed_count, submitted, missed = await run_db(work)
 
     text = (
         "📊 Admin statistika\n\n"
         f"Jami userlar: {total_users}\n"
         f"To'laganlar: {paid_users}\n"
         f"Aktivlar: {active_users}\n"
-        f"Bugun hisobot yuborganlar: {len(submitted)}\n"
-        f"Bugun hisobot yubormaganlar: {len(missed)}"
+        f"Bugun hisobot yuborganlar: {submitted_count}\n"
+        f"Bugun hisobot yubormaganlar: {missed_count}"
     )
     await update.message.reply_text(text)
 
-    submitted_lines = [f"- {_user_label(u)}" for u in submitted[:50]]
-    missed_lines = [f"- {_user_label(u)}" for u in missed[:50]]
+    submitted_lines = [f"- {_user_label(u)}" for u in submitted]
+    missed_lines = [f"- {_user_label(u)}" for u in missed]
 
     await update.message.reply_text(
         "✅ Bugun yuborganlar:\n" + ("\n".join(submitted_lines) if submitted_lines else "- yo'q"),
@@ -442,16 +556,10 @@ async def admin_missed(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             await update.message.reply_text("Foydalanish: /missed yoki /missed YYYY-MM-DD")
             return
 
-    with SessionLocal() as db:
-        paid_users = list(db.scalars(select(User).where(User.payment_status == "paid")))
-        submitted_ids = set(
-            db.scalars(
-                select(DailyModuleReport.user_id)
-                .where(DailyModuleReport.report_date == target_date)
-                .group_by(DailyModuleReport.user_id)
-            )
-        )
-        missed = [u for u in paid_users if u.id not in submitted_ids]
+    def work(db) -> List[User]:
+        return get_missed_users(db, target_date)
+
+    missed = await run_db(work)
 
     lines = [f"- {_user_label(u)}" for u in missed] or ["- yo'q"]
     header = f"⚠️ Hisobot yubormaganlar ({target_date.isoformat()})\nSoni: {len(missed)}\n\n"
@@ -476,11 +584,10 @@ async def admin_kick(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
         await update.message.reply_text("❌ tg_user_id noto'g'ri.")
         return
 
-    with SessionLocal() as db:
+    def work(db) -> Optional[str]:
         user = get_user_by_tg_id(db, target_tg_id)
         if not user:
-            await update.message.reply_text("❌ User topilmadi.")
-            return
+            return None
         before = {
             "status": user.status,
             "is_paid": user.is_paid,
@@ -501,8 +608,13 @@ async def admin_kick(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
             )
         )
         db.commit()
-        label = _user_label(user)
+        return _user_label(user)
 
+    label = await run_write(work)
+    user_cache.invalidate(target_tg_id)
+    if label is None:
+        await update.message.reply_text("❌ User topilmadi.")
+        return
     await update.message.reply_text(f"⛔️ Marafondan chiqarildi:\n{label}")
 
 
@@ -521,25 +633,22 @@ async def admin_rollback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await update.message.reply_text("❌ tg_user_id noto'g'ri.")
         return
 
-    with SessionLocal() as db:
+    def work(db) -> Tuple[bool, str]:
         user = get_user_by_tg_id(db, target_tg_id)
         if not user:
-            await update.message.reply_text("❌ User topilmadi.")
-            return
+            return False, "❌ User topilmadi."
         log = db.scalar(
             select(AuditLog)
             .where(and_(AuditLog.action == "kick_user", AuditLog.target_tg_user_id == target_tg_id))
             .order_by(AuditLog.created_at.desc())
         )
         if not log or not log.payload_json:
-            await update.message.reply_text("❌ Rollback uchun oldingi holat topilmadi.")
-            return
+            return False, "❌ Rollback uchun oldingi holat topilmadi."
         try:
             payload = json.loads(log.payload_json)
             before = payload.get("before", {})
         except Exception:
-            await update.message.reply_text("❌ Rollback payload buzilgan.")
-            return
+            return False, "❌ Rollback payload buzilgan."
 
         user.status = before.get("status", "unpaid")
         user.is_paid = bool(before.get("is_paid", False))
@@ -555,14 +664,19 @@ async def admin_rollback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             )
         )
         db.commit()
-        label = _user_label(user)
+        return True, _user_label(user)
 
+    ok, label = await run_write(work)
+    user_cache.invalidate(target_tg_id)
+    if not ok:
+        await update.message.reply_text(label)
+        return
     await update.message.reply_text(f"♻️ Rollback bajarildi:\n{label}")
 
 
 async def leaderboard(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    with SessionLocal() as db:
-        users = list(
+    def work(db) -> List[User]:
+        return list(
             db.scalars(
                 select(User)
                 .where(User.payment_status == "paid")
@@ -570,6 +684,8 @@ async def leaderboard(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
                 .limit(10)
             )
         )
+
+    users = await run_read(work)
     if not users:
         await update.message.reply_text("Hali leaderboard bo'sh.")
         return
@@ -628,9 +744,11 @@ async def backup_now(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
         await update.message.reply_text("❌ Siz admin emassiz.")
         return
 
-    with SessionLocal() as db:
+    def build(db) -> Tuple[dict, dict]:
         payload = _build_backup_payload(db)
-        restore_test = _backup_restore_test(payload)
+        return payload, _backup_restore_test(payload)
+
+    def audit(db, restore_test: dict) -> None:
         db.add(
             AuditLog(
                 actor_tg_user_id=admin_id,
@@ -641,6 +759,9 @@ async def backup_now(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
         )
         db.commit()
 
+    payload, restore_test = await run_read(build)
+    await run_write(audit, restore_test)
+
     raw = json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
     buf = io.BytesIO(raw)
     buf.name = f"intizomli-backup-{date.today().isoformat()}.json"
@@ -652,9 +773,10 @@ async def restore_test(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     if not _is_admin(admin_id):
         await update.message.reply_text("❌ Siz admin emassiz.")
         return
-    with SessionLocal() as db:
-        payload = _build_backup_payload(db)
-        result = _backup_restore_test(payload)
+    def build(db) -> dict:
+        return _backup_restore_test(_build_backup_payload(db))
+
+    def audit(db, result: dict) -> None:
         db.add(
             AuditLog(
                 actor_tg_user_id=admin_id,
@@ -664,9 +786,45 @@ async def restore_test(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             )
         )
         db.commit()
+
+    result = await run_read(build)
+    await run_write(audit, result)
     await update.message.reply_text(f"🧪 Restore test natijasi: {'OK' if result['ok'] else 'FAILED'}")
 
 
+async def _for_each_user_chunk(fetch: Callable, handle: Callable, run=None) -> Tuple[int, int]:
+    # Keyset-paged over users.id as plain row snapshots; each step gets its own
+    # short session, so no connection or transaction is held across awaits.
+    # Both callbacks run off the event loop. fetch may read from the replica;
+    # handle writes (and reads what it dedupes against) on the primary, through
+    # the group-commit writer when it is enabled.
+    after_id = 0
+    scanned = 0
+    produced = 0
+    while True:
+        started = time.perf_counter()
+        rows = await run_read(fetch, after_id, settings.USER_CHUNK_SIZE)
+        count = await run_write(handle, rows) if rows else 0
+        produced += count
+        if run:
+            run.db_ms += (time.perf_counter() - started) * 1000.0
+            run.users_scanned += len(rows)
+            run.messages_queued = produced
+        if not rows:
+            return scanned, produced
+        scanned += len(rows)
+        after_id = rows[-1].id
+
+
+def _reportable_snapshots(db, after_id: int, limit: int) -> list:
+    return get_user_snapshots(db, after_id, limit, reportable_user_clause())
+
+
+def _sharded_reportable_snapshots(db, after_id: int, limit: int) -> list:
+    # Scheduled jobs only walk the users in the shards this worker leases.
+    return get_user_snapshots(db, after_id, limit, reportable_user_clause(), *shard_criteria(User.tg_user_id))
+
+
 async def weekly_review_job(context: ContextTypes.DEFAULT_TYPE) -> None:
     # Sunday review; safe to run daily on schedule, exits on non-Sunday.
     today = date.today()
@@ -674,28 +832,12 @@ async def weekly_review_job(context: ContextTypes.DEFAULT_TYPE) -> None:
         return
 
     start = today.fromordinal(today.toordinal() - 6)
-    with SessionLocal() as db:
-        users = get_reportable_users(db)
-        for user in users:
-            done = db.scalar(
-                select(func.count()).select_from(DailyModuleReport).where(
-                    and_(
-                        DailyModuleReport.user_id == user.id,
-                        DailyModuleReport.report_date >= start,
-                        DailyModuleReport.report_date <= today,
-                        DailyModuleReport.is_done.is_(True),
-                    )
-                )
-            ) or 0
-            total = db.scalar(
-                select(func.count()).select_from(DailyModuleReport).where(
-                    and_(
-                        DailyModuleReport.user_id == user.id,
-                        DailyModuleReport.report_date >= start,
-                        DailyModuleReport.report_date <= today,
-                    )
-                )
-            ) or 0
+    batch_key = f"weekly:{today.isoformat()}"
+
+    def handle(db, rows) -> int:
+        messages: List[OutgoingMessage] = []
+        for user in rows:
+            done, total = stats.get(user.id, (0, 0))
             percent = int((done * 100) / total) if total else 0
             msg = (
                 "📅 *Haftalik review*\n\n"
@@ -705,10 +847,15 @@ async def weekly_review_job(context: ContextTypes.DEFAULT_TYPE) -> None:
                 f"Joriy streak: {user.current_streak}\n\n"
                 "Kelasi haftaga maqsadni aniq qo'ying va ritmni ushlang."
             )
-            try:
-                await context.bot.send_message(chat_id=user.tg_user_id, text=msg, parse_mode="Markdown")
-            except Exception:
-                continue
+            messages.append(OutgoingMessage(chat_id=user.tg_user_id, text=msg, parse_mode="Markdown"))
+        return enqueue_messages(db, batch_key, messages)
+
+    async with track_job_run("weekly-review") as run:
+        # One grouped scan over the week's reports for everyone, then render per chunk.
+        with run.timing_db():
+            stats = await run_read(get_report_stats_by_user, start, today)
+        await _for_each_user_chunk(_sharded_reportable_snapshots, handle, run)
+    await _kick_outbox(context)
 
 
 async def retention_campaign_job(context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -716,43 +863,50 @@ async def retention_campaign_job(context: ContextTypes.DEFAULT_TYPE) -> None:
     if not retention_points:
         return
     today = date.today()
-    with SessionLocal() as db:
-        users = list(db.scalars(select(User).where(User.payment_status == "paid")))
-        for user in users:
-            last_report = db.scalar(
-                select(func.max(DailyModuleReport.report_date)).where(DailyModuleReport.user_id == user.id)
-            )
-            if not last_report:
-                days_missed = 999
-            else:
-                days_missed = (today - last_report).days
-            if days_missed not in retention_points:
-                continue
+    batch_key = f"retention:{today.isoformat()}"
+    button = _miniapp_button()
+
+    # Only users whose last report is exactly N days back, via the indexed
+    # users.last_report_date column maintained by app_daily_report.
+    target_dates = [today - timedelta(days=days) for days in retention_points]
+
+    def fetch(db, after_id: int, limit: int) -> list:
+        return get_user_snapshots(
+            db,
+            after_id,
+            limit,
+            User.payment_status == "paid",
+            User.blocked_at.is_(None),
+            User.last_report_date.in_(target_dates),
+            *shard_criteria(User.tg_user_id),
+        )
 
+    def handle(db, rows) -> int:
+        messages: List[OutgoingMessage] = []
+        for user in rows:
+            days_missed = (today - user.last_report_date).days
             if days_missed == 2:
                 msg = "⏳ Siz 2 kundan beri hisobot yubormadingiz. Bugun qaytib ritmni tiklang."
             elif days_missed == 3:
                 msg = "⚠️ 3 kunlik uzilish bor. Bugun hisobot yuborib streakni qayta yoqing."
             else:
                 msg = "🚨 5 kunlik tanaffus. Marafonga qaytish uchun bugun kamida 1 modulni bajaring."
-            try:
-                await context.bot.send_message(
-                    chat_id=user.tg_user_id,
-                    text=msg,
-                    reply_markup=InlineKeyboardMarkup(
-                        [[InlineKeyboardButton("📱 Mini Appni ochish", web_app=WebAppInfo(url=build_miniapp_url()))]]
-                    ),
-                )
-            except Exception:
-                continue
+            messages.append(OutgoingMessage(chat_id=user.tg_user_id, text=msg, reply_markup=button))
+        return enqueue_messages(db, batch_key, messages)
+
+    async with track_job_run("retention-campaign") as run:
+        await _for_each_user_chunk(fetch, handle, run)
+    await _kick_outbox(context)
 
 
 async def nightly_backup_job(context: ContextTypes.DEFAULT_TYPE) -> None:
-    if not ADMIN_TG_IDS:
+    if not ADMIN_TG_IDS or not owns_global_jobs():
         return
-    with SessionLocal() as db:
+    def build(db) -> Tuple[dict, dict]:
         payload = _build_backup_payload(db)
-        restore_test = _backup_restore_test(payload)
+        return payload, _backup_restore_test(payload)
+
+    def audit(db, restore_test: dict) -> None:
         db.add(
             AuditLog(
                 actor_tg_user_id=None,
@@ -762,107 +916,226 @@ async def nightly_backup_job(context: ContextTypes.DEFAULT_TYPE) -> None:
             )
         )
         db.commit()
-    raw = json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
-    for admin_id in ADMIN_TG_IDS:
-        try:
-            buf = io.BytesIO(raw)
-            buf.name = f"intizomli-backup-{date.today().isoformat()}.json"
-            await context.bot.send_document(
-                chat_id=admin_id,
-                document=buf,
-                caption=f"🌙 Nightly backup. Restore test: {'OK' if restore_test['ok'] else 'FAILED'}",
+
+    async with track_job_run("nightly-backup") as run:
+        with run.timing_db():
+            payload, restore_test = await run_read(build)
+            await run_write(audit, restore_test)
+        raw = json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+        run.users_scanned = payload["counts"]["users"]
+        with run.timing_send():
+            result = await dispatcher.send_many(
+                context.bot,
+                [
+                    OutgoingMessage(
+                        chat_id=admin_id,
+                        text=f"🌙 Nightly backup. Restore test: {'OK' if restore_test['ok'] else 'FAILED'}",
+                        document=raw,
+                        filename=f"intizomli-backup-{date.today().isoformat()}.json",
+                    )
+                    for admin_id in ADMIN_TG_IDS
+                ],
             )
-        except Exception:
-            continue
+        run.add_dispatch(result)
 
 
-async def _send_module_reminders(context: ContextTypes.DEFAULT_TYPE, slot: str) -> int:
-    sent = 0
-    with SessionLocal() as db:
-        users = get_reportable_users(db)
-        for user in users:
-            modules = _user_modules(user)
-            if not modules:
-                continue
-            today = date.today()
-            total_today = db.scalar(
-                select(func.count()).select_from(DailyModuleReport).where(
-                    and_(DailyModuleReport.user_id == user.id, DailyModuleReport.report_date == today)
-                )
-            ) or 0
-            done_today = db.scalar(
-                select(func.count()).select_from(DailyModuleReport).where(
-                    and_(
-                        DailyModuleReport.user_id == user.id,
-                        DailyModuleReport.report_date == today,
-                        DailyModuleReport.is_done.is_(True),
-                    )
-                )
-            ) or 0
-            pending_hint = ""
-            if slot == "night":
-                if total_today == 0:
-                    pending_hint = "\n\n⚠️ Bugun hali hisobot yuborilmadi."
-                elif done_today < total_today:
-                    pending_hint = f"\n\n⚠️ Hisobot tugallanmagan: {done_today}/{total_today}"
-
-            if slot == "morning":
-                msg = (
-                    "🌅 *Tonggi eslatma*\n\n"
-                    "Yangi kun boshlandi. Bugungi odatlar, sport va mutolaani bajarishni boshlang."
-                )
-            elif slot == "midday":
-                msg = (
-                    "🕑 *Kun yarmidagi eslatma*\n\n"
-                    "Rejadan ortda qolmang, bugungi vazifalarni davom ettiring."
-                )
-            else:
-                msg = (
-                    "🌙 *Tungi eslatma*\n\n"
-                    "Kun yakunlandi. Mini App'da bugungi hisobotni yuborishni unutmang."
-                )
-            msg = msg + f"\n\nBugungi modullar: {', '.join(modules)}{pending_hint}"
-            try:
-                await context.bot.send_message(
-                    chat_id=user.tg_user_id,
-                    text=msg,
-                    reply_markup=InlineKeyboardMarkup(
-                        [[InlineKeyboardButton("📱 Mini Appni ochish", web_app=WebAppInfo(url=build_miniapp_url()))]]
-                    ),
-                )
-                sent += 1
-            except Exception:
-                continue
-
-        if slot == "night" and ADMIN_TG_IDS:
-            paid_users = list(db.scalars(select(User).where(User.payment_status == "paid")))
-            submitted_ids = set(
-                db.scalars(
-                    select(DailyModuleReport.user_id)
-                    .where(DailyModuleReport.report_date == date.today())
-                    .group_by(DailyModuleReport.user_id)
-                )
+def _reminder_text(slot: str, modules: List[str], done_today: int, total_today: int) -> str:
+    pending_hint = ""
+    if slot == "night":
+        if total_today == 0:
+            pending_hint = "\n\n⚠️ Bugun hali hisobot yuborilmadi."
+        elif done_today < total_today:
+            pending_hint = f"\n\n⚠️ Hisobot tugallanmagan: {done_today}/{total_today}"
+
+    if slot == "morning":
+        msg = (
+            "🌅 *Tonggi eslatma*\n\n"
+            "Yangi kun boshlandi. Bugungi odatlar, sport va mutolaani bajarishni boshlang."
+        )
+    elif slot == "midday":
+        msg = (
+            "🕑 *Kun yarmidagi eslatma*\n\n"
+            "Rejadan ortda qolmang, bugungi vazifalarni davom ettiring."
+        )
+    else:
+        msg = (
+            "🌙 *Tungi eslatma*\n\n"
+            "Kun yakunlandi. Mini App'da bugungi hisobotni yuborishni unutmang."
+        )
+    return msg + f"\n\nBugungi modullar: {', '.join(modules)}{pending_hint}"
+
+
+def _spread_offset(tg_user_id: int) -> timedelta:
+    # Stable per-user offset inside the spread window, so Mini App opens from a
+    # reminder arrive evenly instead of all at the top of the hour.
+    window = settings.REMINDER_SPREAD_MINUTES * 60
+    if window <= 0:
+        return timedelta(0)
+    return timedelta(seconds=zlib.crc32(str(tg_user_id).encode()) % window)
+
+
+def _build_reminder_messages(
+    rows: list,
+    stats: Dict[int, tuple],
+    button: InlineKeyboardMarkup,
+    slot: Optional[str] = None,
+    spread_from: Optional[datetime] = None,
+    plans: Optional[Dict[int, tuple]] = None,
+) -> List[OutgoingMessage]:
+    messages: List[OutgoingMessage] = []
+    plans = plans or {}
+    for user in rows:
+        # Today's plan snapshot when it has items; users without one yet, or
+        # with nothing scheduled today, get their selected modules.
+        modules = plans.get(user.id, ([], 0))[0] or _user_modules(user)
+        if not modules:
+            continue
+        done_today, total_today = stats.get(user.id, (0, 0))
+        messages.append(
+            OutgoingMessage(
+                chat_id=user.tg_user_id,
+                text=_reminder_text(slot or user.slot, modules, done_today, total_today),
+                reply_markup=button,
+                not_before=spread_from + _spread_offset(user.tg_user_id) if spread_from else None,
             )
-            missed = [u for u in paid_users if u.id not in submitted_ids]
-            if missed:
-                lines = [f"- {_user_label(u)}" for u in missed[:50]]
-                admin_text = (
-                    f"🚨 Mentor ping\\n\\n"
-                    f"Bugun hisobot yubormaganlar soni: {len(missed)}\\n\\n"
-                    + "\\n".join(lines)
+        )
+    return messages
+
+
+def _mentor_ping_messages(db, today: date) -> List[OutgoingMessage]:
+    if not ADMIN_TG_IDS:
+        return []
+    missed_count = count_missed_users(db, today)
+    if not missed_count:
+        return []
+    lines = [f"- {_user_label(u)}" for u in get_missed_users(db, today, limit=50)]
+    admin_text = (
+        f"🚨 Mentor ping\\n\\n"
+        f"Bugun hisobot yubormaganlar soni: {missed_count}\\n\\n"
+        + "\\n".join(lines)
+    )
+    return [OutgoingMessage(chat_id=admin_tg_id, text=admin_text) for admin_tg_id in ADMIN_TG_IDS]
+
+
+def _enqueue_mentor_ping(db, batch_key: str, today: date) -> int:
+    return enqueue_messages(db, batch_key, _mentor_ping_messages(db, today))
+
+
+async def day_close_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    # After midnight: settle yesterday for everyone in a few set-based statements.
+    if not owns_global_jobs():
+        return
+    day = date.today() - timedelta(days=1)
+    async with track_job_run("day-close") as run:
+        with run.timing_db():
+            result = await run_write(close_day, day)
+        run.users_scanned = result["submitted"] + result["missed"]
+        run.details = {"day": day.isoformat(), **result}
+
+
+async def daily_plan_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    # Just after midnight: snapshot today's checklist for every participant in
+    # this worker's shards, so daily reads, scoring and reminders reuse one row.
+    day = date.today()
+    criteria = shard_criteria(User.tg_user_id)
+    after_id = 0
+    async with track_job_run("daily-plans") as run:
+        while True:
+            with run.timing_db():
+                last_id, created = await run_write(
+                    materialize_daily_plans, day, after_id, settings.USER_CHUNK_SIZE, *criteria
                 )
-                for admin_tg_id in ADMIN_TG_IDS:
-                    try:
-                        await context.bot.send_message(chat_id=admin_tg_id, text=admin_text)
-                    except Exception:
-                        continue
-    return sent
+            if last_id == after_id:
+                break
+            run.users_scanned += created
+            after_id = last_id
+        run.details = {"day": day.isoformat(), "created": run.users_scanned}
+
+
+async def outbox_drain_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    global _outbox_pruned_at
+    async with track_job_run("outbox-drain") as run:
+        result = await drain_outbox(context.bot, run=run)
+        pruned = 0
+        if owns_global_jobs() and time.monotonic() - _outbox_pruned_at >= OUTBOX_PRUNE_INTERVAL_SEC:
+            _outbox_pruned_at = time.monotonic()
+            before = datetime.utcnow() - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+            with run.timing_db():
+                while True:
+                    deleted = await run_write(prune_outbox, before, OUTBOX_PRUNE_CHUNK)
+                    pruned += deleted
+                    if deleted < OUTBOX_PRUNE_CHUNK:
+                        break
+            run.details = {"pruned": pruned}
+        # Runs every few seconds; only keep runs that actually did something.
+        run.skip = not (result.sent or result.failed or pruned)
+
+
+async def _kick_outbox(context: ContextTypes.DEFAULT_TYPE) -> None:
+    # Jobs only enqueue; delivery happens in the drainer so the job itself
+    # finishes as soon as the rows are written.
+    if _active_role == "updates":
+        # The jobs process drains on its own interval; keep sends off this loop.
+        return
+    if context.job_queue:
+        context.job_queue.run_once(outbox_drain_job, 0, name="outbox-drain-now")
+    else:
+        await outbox_drain_job(context)
 
 
-async def module_reminder_job(context: ContextTypes.DEFAULT_TYPE) -> None:
-    hour = context.job.data.get("hour") if context.job else None
-    slot = _reminder_slot(int(hour)) if hour is not None else "midday"
-    await _send_module_reminders(context, slot)
+async def _send_module_reminders(context: ContextTypes.DEFAULT_TYPE, slot: str) -> int:
+    # Same slot for every reportable user; used by /remindnow.
+    today = date.today()
+    batch_key = f"remindnow:{slot}:{datetime.utcnow():%Y%m%d%H%M%S}"
+    button = _miniapp_button()
+
+    def handle(db, rows) -> int:
+        # One grouped aggregate per chunk instead of two COUNT(*) round trips per user.
+        user_ids = [row.id for row in rows]
+        stats = get_report_stats_by_user(db, today, user_ids=user_ids)
+        plans = get_plan_summaries(db, user_ids, today)
+        return enqueue_messages(db, batch_key, _build_reminder_messages(rows, stats, button, slot, plans=plans))
+
+    async with track_job_run("remindnow") as run:
+        _, queued = await _for_each_user_chunk(_reportable_snapshots, handle, run)
+        if slot == "night":
+            with run.timing_db():
+                await run_write(_enqueue_mentor_ping, f"{batch_key}:mentor", today)
+    await _kick_outbox(context)
+    return queued
+
+
+async def reminder_tick_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    # Runs at the top of every hour and only loads users whose own reminder
+    # hour (in their own timezone) is the current one.
+    now = (datetime.now(timezone.utc) + timedelta(minutes=5)).replace(minute=0, second=0, microsecond=0)
+    # Reports and plans are dated with the server's date.today(), so the
+    # "done today" lookup uses the same day for every timezone.
+    today = date.today()
+    batch_key = f"reminder:{now:%Y-%m-%dT%H}"
+    spread_from = now.replace(tzinfo=None)
+    button = _miniapp_button()
+    buckets: list = []
+
+    def fetch(db, after_id: int, limit: int) -> list:
+        return get_due_reminders(db, buckets, after_id, limit, *shard_criteria(User.tg_user_id))
+
+    def handle(db, rows) -> int:
+        user_ids = [row.id for row in rows]
+        stats = get_report_stats_by_user(db, today, user_ids=user_ids)
+        plans = get_plan_summaries(db, user_ids, today)
+        return enqueue_messages(
+            db, batch_key, _build_reminder_messages(rows, stats, button, spread_from=spread_from, plans=plans)
+        )
+
+    async with track_job_run("reminder-tick") as run:
+        with run.timing_db():
+            buckets = await run_read(reminder_buckets, now)
+        await _for_each_user_chunk(fetch, handle, run)
+        if now.astimezone(_bot_tz()).hour == REMINDER_HOURS[-1] and owns_global_jobs():
+            with run.timing_db():
+                await run_write(_enqueue_mentor_ping, f"{batch_key}:mentor", today)
+    await _kick_outbox(context)
 
 
 async def remind_now(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -880,15 +1153,144 @@ async def remind_now(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
     # Reuse reminder pipeline without waiting scheduler time.
     sent = await _send_module_reminders(context, slot)
 
-    await update.message.reply_text(f"✅ remindnow bajarildi. Slot: {slot}. Yuborildi: {sent} ta user.")
+    await update.message.reply_text(f"✅ remindnow bajarildi. Slot: {slot}. Navbatga qo'yildi: {sent} ta user.")
 
 
-def run() -> None:
-    if not BOT_TOKEN:
-        raise RuntimeError("BOT_TOKEN topilmadi")
+def _parse_broadcast_command(raw: str) -> Tuple[Dict[str, str], str]:
+    # "/broadcast module=sports missed=2 | Matn" -> ({"module": "sports", "missed": "2"}, "Matn")
+    parts = (raw or "").split(maxsplit=1)
+    head, _, text = (parts[1] if len(parts) > 1 else "").partition("|")
+    filters: Dict[str, str] = {}
+    for item in head.split():
+        key, sep, value = item.partition("=")
+        if sep:
+            filters[key.strip().lower()] = value.strip()
+    return filters, text.strip()
+
+
+async def _run_broadcast_enqueue(broadcast_id: int) -> int:
+    def load(db) -> Tuple[dict, str]:
+        broadcast = db.get(Broadcast, broadcast_id)
+        if broadcast.status == "queued":
+            broadcast.status = "enqueuing"
+            db.commit()
+        return broadcast_segment(broadcast), broadcast.text
+
+    segment, text = await run_write(load)
+
+    def fetch(db, after_id: int, limit: int) -> list:
+        return get_segment_snapshots(db, segment, after_id, limit)
+
+    def handle(db, rows) -> int:
+        return enqueue_broadcast_chunk(db, broadcast_id, text, rows)
+
+    def finish(db) -> None:
+        finish_broadcast_enqueue(db, db.get(Broadcast, broadcast_id))
+
+    _, queued = await _for_each_user_chunk(fetch, handle)
+    await run_write(finish)
+    return queued
+
+
+async def broadcast_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    admin_id = update.effective_user.id
+    if not _is_admin(admin_id):
+        await update.message.reply_text("❌ Siz admin emassiz.")
+        return
+
+    usage = (
+        "Foydalanish: /broadcast [module=habits|sports|reading] [paid=1|0] [missed=N] | Matn\n"
+        "Matnsiz yuborilsa faqat segment soni ko'rsatiladi."
+    )
+    filters, text = _parse_broadcast_command(update.message.text or "")
+    raw_segment = {"module": filters.get("module"), "paid": filters.get("paid", "1"), "missed_days": filters.get("missed")}
+    try:
+        segment = parse_segment(raw_segment)
+    except ValueError as exc:
+        await update.message.reply_text(f"❌ {exc}\n\n{usage}")
+        return
+    if not text:
+        count = await run_db(count_segment, segment)
+        await update.message.reply_text(f"👥 Segment: {count} ta user.\n\n{usage}")
+        return
+
+    def create(db) -> Tuple[int, str]:
+        broadcast = create_broadcast(db, text, segment, admin_id, update.effective_chat.id)
+        db.add(
+            AuditLog(
+                actor_tg_user_id=admin_id,
+                action="admin_broadcast",
+                payload_json=json.dumps({"broadcast_id": broadcast.id, "segment": segment}, ensure_ascii=False),
+            )
+        )
+        db.commit()
+        return broadcast.id, broadcast_progress_text(broadcast)
+
+    def set_progress_message(db, message_id: int) -> None:
+        db.get(Broadcast, broadcast_id).progress_message_id = message_id
+        db.commit()
+
+    broadcast_id, progress_text = await run_write(create)
+    progress = await update.message.reply_text(progress_text)
+    await run_write(set_progress_message, progress.message_id)
+
+    await _run_broadcast_enqueue(broadcast_id)
+    await _kick_outbox(context)
+
+
+async def broadcast_progress_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    # Enqueues broadcasts queued by the admin API, finishes ones whose enqueue
+    # was interrupted (restart mid-fan-out) and keeps each admin's progress
+    # message up to date.
+    if not owns_global_jobs():
+        return
+    stale_before = datetime.utcnow() - timedelta(minutes=10)
+
+    def load_active(db) -> list:
+        return [(b.id, b.status, b.updated_at) for b in get_active_broadcasts(db)]
+
+    def refresh(db, broadcast_id: int) -> Optional[Tuple[int, int, str]]:
+        broadcast = db.get(Broadcast, broadcast_id)
+        if not refresh_broadcast_progress(db, broadcast) or not broadcast.progress_message_id:
+            return None
+        return broadcast.progress_chat_id, broadcast.progress_message_id, broadcast_progress_text(broadcast)
+
+    for broadcast_id, status, updated_at in await run_db(load_active):
+        if status == "queued" or (status == "enqueuing" and updated_at and updated_at < stale_before):
+            await _run_broadcast_enqueue(broadcast_id)
+            await _kick_outbox(context)
+        progress = await run_write(refresh, broadcast_id)
+        if not progress:
+            continue
+        chat_id, message_id, text = progress
+        try:
+            await context.bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=text)
+        except Exception as exc:
+            print(f"broadcast #{broadcast_id} progress edit failed: {type(exc).__name__}")
+
+
+async def lease_heartbeat_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    # Default executor, not the bounded DB pool: a renewal must not queue
+    # behind long job queries and let the leases expire.
+    _, acquired = await asyncio.get_running_loop().run_in_executor(None, heartbeat_leases)
+    if acquired and context.job_queue:
+        # Shards taken over from a dead worker: re-run this hour's tick for them.
+        # Already-queued users are skipped by the outbox dedupe key.
+        print(f"shards acquired: {acquired}")
+        context.job_queue.run_once(reminder_tick_job, 0, name="reminder-tick-catchup")
+
 
-    app = Application.builder().token(BOT_TOKEN).build()
+async def claim_leases_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    owned, _ = await asyncio.get_running_loop().run_in_executor(None, heartbeat_leases)
+    print(f"Worker {settings.WORKER_ID}: shards {owned} / {settings.JOB_SHARDS}")
 
+
+async def _on_shutdown(app: Application) -> None:
+    release_leases()
+    stop_writer()
+
+
+def _register_handlers(app: Application) -> None:
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("code", create_code))
     app.add_handler(CommandHandler("codes", create_codes))
@@ -899,25 +1301,52 @@ def run() -> None:
     app.add_handler(CommandHandler("rollback", admin_rollback))
     app.add_handler(CommandHandler("leaderboard", leaderboard))
     app.add_handler(CommandHandler("remindnow", remind_now))
+    app.add_handler(CommandHandler("broadcast", broadcast_command))
     app.add_handler(CommandHandler("backupnow", backup_now))
     app.add_handler(CommandHandler("restoretest", restore_test))
     app.add_handler(CallbackQueryHandler(on_intro, pattern=r"^intro:"))
     app.add_handler(CallbackQueryHandler(on_menu, pattern=r"^menu:"))
     app.add_handler(MessageHandler(filters.StatusUpdate.WEB_APP_DATA, on_webapp_data))
 
+
+def _schedule_jobs(app: Application) -> None:
     if app.job_queue:
-        try:
-            tz = ZoneInfo(BOT_TIMEZONE)
-        except Exception:
-            tz = ZoneInfo("UTC")
-
-        for hr in REMINDER_HOURS[:3]:
-            app.job_queue.run_daily(
-                module_reminder_job,
-                time=dtime(hour=int(hr), minute=0, tzinfo=tz),
-                name=f"module-reminder-{hr}",
-                data={"hour": int(hr)},
-            )
+        tz = _bot_tz()
+
+        # The first claim runs as a job, off the event loop; until it lands this
+        # worker owns no shards, so early jobs and commands skip sharded work.
+        begin_leasing()
+        app.job_queue.run_once(claim_leases_job, 0, name="lease-claim")
+        app.job_queue.run_repeating(
+            lease_heartbeat_job,
+            interval=timedelta(seconds=max(5, settings.JOB_LEASE_TTL_SEC // 3)),
+            first=max(5, settings.JOB_LEASE_TTL_SEC // 3),
+            name="lease-heartbeat",
+            data={"kind": "lease"},
+        )
+
+        next_hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        app.job_queue.run_repeating(
+            reminder_tick_job,
+            interval=timedelta(hours=1),
+            first=next_hour,
+            name="reminder-tick",
+            data={"kind": "reminder-tick"},
+        )
+        app.job_queue.run_repeating(
+            outbox_drain_job,
+            interval=timedelta(seconds=settings.OUTBOX_DRAIN_INTERVAL_SEC),
+            first=5,
+            name="outbox-drain",
+            data={"kind": "outbox"},
+        )
+        app.job_queue.run_repeating(
+            broadcast_progress_job,
+            interval=timedelta(seconds=settings.BROADCAST_PROGRESS_INTERVAL_SEC),
+            first=10,
+            name="broadcast-progress",
+            data={"kind": "broadcast"},
+        )
         app.job_queue.run_daily(
             weekly_review_job,
             time=dtime(hour=21, minute=30, tzinfo=tz),
@@ -930,6 +1359,18 @@ def run() -> None:
             name="retention-campaign",
             data={"kind": "retention"},
         )
+        app.job_queue.run_daily(
+            daily_plan_job,
+            time=dtime(hour=0, minute=5, tzinfo=_server_tz()),
+            name="daily-plans",
+            data={"kind": "daily-plans"},
+        )
+        app.job_queue.run_daily(
+            day_close_job,
+            time=dtime(hour=0, minute=15, tzinfo=_server_tz()),
+            name="day-close",
+            data={"kind": "day-close"},
+        )
         app.job_queue.run_daily(
             nightly_backup_job,
             time=dtime(hour=23, minute=45, tzinfo=tz),
@@ -937,9 +1378,83 @@ def run() -> None:
             data={"kind": "backup"},
         )
 
-    print("✅ Bot ishga tushdi...")
+
+async def _run_jobs_only(app: Application) -> None:
+    # No polling: only the job queue runs until SIGINT/SIGTERM.
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+    async with app:
+        await app.start()
+        print("✅ Bot joblari ishga tushdi (role=jobs)...")
+        await stop.wait()
+        await app.stop()
+    release_leases()
+    stop_writer()
+
+
+async def _run_webhook(app: Application) -> None:
+    # Updates arrive over HTTP; the same event loop runs the job queue when the
+    # role includes jobs. uvicorn handles SIGINT/SIGTERM.
+    server = uvicorn.Server(
+        uvicorn.Config(
+            build_webhook_api(app), host=settings.WEBHOOK_LISTEN, port=settings.WEBHOOK_PORT, log_level="warning"
+        )
+    )
+    print(f"✅ Bot ishga tushdi (role={_active_role}, webhook :{settings.WEBHOOK_PORT})...")
+    await server.serve()
+    release_leases()
+    stop_writer()
+
+
+def build_application(role: Optional[str] = None) -> Application:
+    global _active_role
+    if not BOT_TOKEN:
+        raise RuntimeError("BOT_TOKEN topilmadi")
+    role = (role or settings.BOT_ROLE).strip().lower()
+    if role not in BOT_ROLES:
+        raise RuntimeError(f"Noto'g'ri role: {role} ({', '.join(BOT_ROLES)})")
+    _active_role = role
+
+    app = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        # Handlers for different updates run side by side, up to this many at once.
+        .concurrent_updates(settings.BOT_UPDATE_CONCURRENCY)
+        .post_shutdown(_on_shutdown)
+        .build()
+    )
+    if role in ("all", "updates"):
+        _register_handlers(app)
+    if role in ("all", "jobs"):
+        _schedule_jobs(app)
+    return app
+
+
+def run(role: Optional[str] = None, mode: Optional[str] = None) -> None:
+    app = build_application(role)
+    mode = (mode or settings.BOT_MODE).strip().lower()
+    if mode not in BOT_MODES:
+        raise RuntimeError(f"Noto'g'ri mode: {mode} ({', '.join(BOT_MODES)})")
+
+    if _active_role == "jobs":
+        asyncio.run(_run_jobs_only(app))
+        return
+    if mode == "webhook":
+        asyncio.run(_run_webhook(app))
+        return
+
+    print(f"✅ Bot ishga tushdi (role={_active_role})...")
     app.run_polling()
 
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--role", choices=BOT_ROLES, default=None, help="all (default), updates yoki jobs")
+    parser.add_argument("--mode", choices=BOT_MODES, default=None, help="polling (default) yoki webhook")
+    args = parser.parse_args()
+    run(args.role, args.mode)